@@ -3,231 +3,543 @@ import os
 import json
 import unittest
 import importlib.util
+import importlib.metadata
+import functools
+import hashlib
+import ast
+import re
+import html
 from dotenv import load_dotenv
 from src.test_generator import TestGenerator
 from config.config import Config
 from io import StringIO
 import sys
 import tempfile
-import re
-import time
+import subprocess
+import codecs
+import queue
 import docker
-import uuid
 import shutil
+import threading
+import socket
+import time
+import atexit
 from pathlib import Path
+from collections import OrderedDict
 import logging
+import traceback
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Static sidebar text, built once at import time
+_ABOUT_MD = """
+This tool uses AI to:
+- Generate unit tests
+- Analyze code quality
+- Provide detailed feedback
+- Suggest improvements
+"""
+
+# Large uploads are previewed truncated to keep reruns cheap
+_PREVIEW_MAX_CHARS = 50_000
+_PREVIEW_MAX_LINES = 500
+
+# Standard library module names; sys.stdlib_module_names needs Python 3.10+
+_STDLIB = frozenset(getattr(sys, 'stdlib_module_names', ()) or [
+    'abc', 'argparse', 'ast', 'asyncio', 'base64', 'collections', 
+    'concurrent', 'contextlib', 'copy', 'csv', 'datetime', 'decimal', 
+    'difflib', 'enum', 'fileinput', 'fnmatch', 'functools', 'glob', 
+    'gzip', 'hashlib', 'heapq', 'hmac', 'html', 'http', 'importlib', 
+    'inspect', 'io', 'itertools', 'json', 'logging', 'math', 'multiprocessing', 
+    'operator', 'os', 'pathlib', 'pickle', 'platform', 'pprint', 'random', 
+    're', 'shutil', 'signal', 'socket', 'sqlite3', 'statistics', 'string', 
+    'subprocess', 'sys', 'tempfile', 'threading', 'time', 'traceback', 
+    'types', 'typing', 'unittest', 'urllib', 'uuid', 'warnings', 'weakref', 
+    'xml', 'zipfile'
+])
+
+@functools.lru_cache(maxsize=1)
+def _installed_packages() -> frozenset:
+    """Names of installed distributions and the top-level modules they provide"""
+    names = {dist.metadata['Name'].lower() for dist in importlib.metadata.distributions()
+             if dist.metadata['Name']}
+    if hasattr(importlib.metadata, 'packages_distributions'):
+        names.update(importlib.metadata.packages_distributions())
+    return frozenset(names)
+
+# Common import aliases and their package names
+_PACKAGE_MAPPINGS = {
+    'np': 'numpy',
+    'pd': 'pandas',
+    'plt': 'matplotlib',
+    'tf': 'tensorflow',
+    'torch': 'pytorch',
+    'cv2': 'opencv-python',
+    'sk': 'scikit-learn'
+}
+
+class _ImportCollector(ast.NodeVisitor):
+    """Collect imported top-level packages, visiting statement blocks only"""
+    def __init__(self):
+        self.packages = set()
+
+    def generic_visit(self, node):
+        # Only statement blocks can hold imports; never descend into expressions
+        # Function and class bodies go through here too, so guarded local imports
+        # such as try: import yaml / except ImportError are still found
+        for field in ('body', 'orelse', 'finalbody', 'handlers', 'cases'):
+            for child in getattr(node, field, ()):
+                self.visit(child)
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            package = alias.name.partition('.')[0]
+            self.packages.add(_PACKAGE_MAPPINGS.get(package, package))
+
+    def visit_ImportFrom(self, node):
+        if node.module:
+            package = node.module.partition('.')[0]
+            self.packages.add(_PACKAGE_MAPPINGS.get(package, package))
+
+# Imported packages per content digest, most recently used last; keyed on the
+# digest alone so lookups never hash or compare the source and it is not kept
+_IMPORT_SCANS = OrderedDict()
+_IMPORT_SCANS_MAX = 64
+_import_scans_lock = threading.Lock()
+
+def _scan_imports_cached(code_hash: bytes, code: str) -> frozenset:
+    """Parse code once per content hash and return its imported packages"""
+    with _import_scans_lock:
+        packages = _IMPORT_SCANS.get(code_hash)
+        if packages is not None:
+            _IMPORT_SCANS.move_to_end(code_hash)
+            return packages
+
+    collector = _ImportCollector()
+    collector.visit(ast.parse(code))
+    packages = frozenset(collector.packages)
+    with _import_scans_lock:
+        _IMPORT_SCANS[code_hash] = packages
+        if len(_IMPORT_SCANS) > _IMPORT_SCANS_MAX:
+            _IMPORT_SCANS.popitem(last=False)
+    return packages
+
 class PackageDetector:
     def __init__(self):
         self.required_packages = set()
         self.installed_packages = self.get_installed_packages()
         # Add common package mappings
-        self.package_mappings = {
-            'np': 'numpy',
-            'pd': 'pandas',
-            'plt': 'matplotlib',
-            'tf': 'tensorflow',
-            'torch': 'pytorch',
-            'cv2': 'opencv-python',
-            'sk': 'scikit-learn'
-        }
+        self.package_mappings = _PACKAGE_MAPPINGS
         # Standard library modules
-        self.stdlib_modules = self._get_stdlib_modules()
-
-    def _get_stdlib_modules(self):
-        """Get a set of standard library module names"""
-        import sys
-        import distutils.sysconfig as sysconfig
-        import os
-
-        stdlib_path = sysconfig.get_python_lib(standard_lib=True)
-        stdlib_modules = set()
-        
-        # Add known standard modules
-        stdlib_modules.update([
-            'abc', 'argparse', 'ast', 'asyncio', 'base64', 'collections', 
-            'concurrent', 'contextlib', 'copy', 'csv', 'datetime', 'decimal', 
-            'difflib', 'enum', 'fileinput', 'fnmatch', 'functools', 'glob', 
-            'gzip', 'hashlib', 'heapq', 'hmac', 'html', 'http', 'importlib', 
-            'inspect', 'io', 'itertools', 'json', 'logging', 'math', 'multiprocessing', 
-            'operator', 'os', 'pathlib', 'pickle', 'platform', 'pprint', 'random', 
-            're', 'shutil', 'signal', 'socket', 'sqlite3', 'statistics', 'string', 
-            'subprocess', 'sys', 'tempfile', 'threading', 'time', 'traceback', 
-            'types', 'typing', 'unittest', 'urllib', 'uuid', 'warnings', 'weakref', 
-            'xml', 'zipfile'
-        ])
-
-        return stdlib_modules
+        self.stdlib_modules = _STDLIB
 
     def get_installed_packages(self):
         """Get list of installed packages"""
-        import pkg_resources
-        return {pkg.key for pkg in pkg_resources.working_set}
+        return _installed_packages()
 
     def scan_for_imports(self, code_content):
         """Scan code for import statements"""
-        import ast
+        code_hash = hashlib.blake2b(code_content.encode(), digest_size=16).digest()
         try:
-            tree = ast.parse(code_content)
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Import):
-                    for alias in node.names:
-                        package = alias.name.split('.')[0]
-                        # Check package mappings
-                        if package in self.package_mappings:
-                            package = self.package_mappings[package]
-                        if not self._is_stdlib_package(package):
-                            self.required_packages.add(package)
-                elif isinstance(node, ast.ImportFrom):
-                    if node.module:
-                        package = node.module.split('.')[0]
-                        # Check package mappings
-                        if package in self.package_mappings:
-                            package = self.package_mappings[package]
-                        if not self._is_stdlib_package(package):
-                            self.required_packages.add(package)
+            packages = _scan_imports_cached(code_hash, code_content)
         except Exception as e:
             logger.error(f"Error scanning imports: {e}")
             return set()
-        
+
+        # One C-level set difference instead of a per-package membership call
+        self.required_packages = set(packages - _STDLIB)
         return self.required_packages
 
     def _is_stdlib_package(self, package_name):
         """Check if package is part of Python standard library"""
-        return package_name in self.stdlib_modules
+        return package_name in _STDLIB
 
     def get_missing_packages(self):
         """Get list of packages that need to be installed"""
         return self.required_packages - self.installed_packages
 
+def _filter_output(output):
+    """Filter out pip warnings and blank lines"""
+    output_lines = [
+        line for line in output.split('\n')
+        if not line.startswith('WARNING:') and 
+           not line.startswith('[notice]') and
+           line.strip()
+    ]
+    return '\n'.join(output_lines)
+
+# Seconds a test suite may run, and how long a run waits for a free container
+_TEST_TIMEOUT = 60
+_SLOT_WAIT_SECONDS = 120
+# Extra seconds before a Docker run that outlives its timeout has its container removed
+_KILL_GRACE = 10
+
+class LocalTestRunner:
+    """Runs tests in a local subprocess, skipping Docker for trusted local use"""
+    def run_test(self, code_content, test_content, on_progress=None):
+        # Output is captured in one go here, so on_progress is not called
+        try:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                Path(temp_dir, 'uploaded_code.py').write_text(code_content, encoding='utf-8')
+                Path(temp_dir, 'test_uploaded_code.py').write_text(test_content, encoding='utf-8')
+
+                result = subprocess.run(
+                    [sys.executable, '-m', 'unittest', '-v', 'test_uploaded_code.py'],
+                    cwd=temp_dir,
+                    capture_output=True,
+                    text=True,
+                    timeout=_TEST_TIMEOUT
+                )
+                return _filter_output(result.stdout + result.stderr)
+
+        except Exception as e:
+            logger.error(f"Local test execution error: {e}")
+            return f"Error: {str(e)}"
+
+# Label on warm containers: "<host>:<pid>" of the process that started them
+_RUNNER_LABEL = 'ai_codechecker.runner'
+
+def _runner_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+# Run script shared by every warm container; mounted read-only outside the slot
+_SETUP_SCRIPT = """#!/bin/bash
+if [ -s requirements.txt ]; then
+    pip install --user -r requirements.txt 2>/dev/null
+fi
+python -m unittest -v test_uploaded_code.py
+"""
+
 class DockerTestRunner:
-    def __init__(self):
+    def __init__(self, pool_size: int = 2):
         self.client = docker.from_env()
         self.image_name = 'python-test-runner'
         self.image_tag = 'v1'
 
-    def run_test(self, code_content, test_content):
+        self.ensure_image()
+
+        # Keep a small pool of started containers and exec each test run inside
+        # whichever one is free. A container serves a single run: afterwards it is
+        # replaced in the background, so no files, home directory or user
+        # site-packages carry over from one run to the next.
+        self._reap_orphans()
+        self.workdir = Path(tempfile.mkdtemp())
+        # IDs of the containers this runner started, for teardown
+        self.owned = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._free_slots = queue.Queue()
+        self._setup_script = self.workdir / 'setup.sh'
+        self._setup_script.write_text(_SETUP_SCRIPT)
+        self._setup_script.chmod(0o755)
         try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # Create test files
-                code_path = os.path.join(temp_dir, 'uploaded_code.py')
-                test_path = os.path.join(temp_dir, 'test_uploaded_code.py')
-                init_path = os.path.join(temp_dir, '__init__.py')
-                
-                # Write files
-                with open(code_path, 'w') as f:
-                    f.write(code_content)
-                with open(test_path, 'w') as f:
-                    f.write(test_content)
-                with open(init_path, 'w') as f:
-                    f.write('')
-
-                # Detect and write requirements
-                package_detector = PackageDetector()
-                required_packages = package_detector.scan_for_imports(code_content)
-                requirements_path = os.path.join(temp_dir, 'requirements.txt')
-                with open(requirements_path, 'w') as f:
-                    for package in required_packages:
-                        f.write(f"{package}\n")
-                
-                # Create setup script with user-specific pip install
-                setup_script = os.path.join(temp_dir, 'setup.sh')
-                with open(setup_script, 'w') as f:
-                    f.write("""#!/bin/bash
-                        if [ -f requirements.txt ]; then
-                            pip install --user -r requirements.txt 2>/dev/null
-                        fi
-                        python -m unittest -v test_uploaded_code.py
-                    """)
-                
-                # Set execute permission for setup script
-                os.chmod(setup_script, 0o755)
+            for _ in range(pool_size):
+                self._free_slots.put(self._start_slot())
+        except Exception:
+            # Do not leave the containers that did start running
+            self.close()
+            raise
+        atexit.register(self.close)
+
+    def _start_slot(self) -> tuple:
+        """Start a container that mounts only its own fresh scratch directory"""
+        slot_dir = Path(tempfile.mkdtemp(prefix='slot', dir=self.workdir))
+        slot_dir.chmod(0o755)
+        (slot_dir / '__init__.py').touch()
+        container = self.client.containers.run(
+            f"{self.image_name}:{self.image_tag}",
+            command=['sleep', 'infinity'],
+            volumes={
+                str(slot_dir): {'bind': '/app', 'mode': 'rw'},
+                str(self._setup_script): {'bind': '/runner/setup.sh', 'mode': 'ro'}
+            },
+            working_dir='/app',
+            detach=True,
+            auto_remove=True,
+            labels={_RUNNER_LABEL: _runner_owner()},
+            user='1000:1000'  # Run as testuser
+        )
+        with self._lock:
+            if not self._closed:
+                self.owned.add(container.id)
+                return container, slot_dir
+        # close() ran while this container was starting
+        self._remove(container.id)
+        raise RuntimeError("Test runner is closed")
+
+    def _remove(self, container_id: str) -> None:
+        try:
+            self.client.api.remove_container(container_id, force=True)
+        except docker.errors.NotFound:
+            pass
+        except Exception as e:
+            logger.error(f"Error removing test container: {e}")
+            return
+        with self._lock:
+            self.owned.discard(container_id)
+
+    def _recycle(self, container, slot_dir: Path) -> None:
+        """Replace a used container and its scratch directory on a background thread"""
+        def replace():
+            self._remove(container.id)
+            shutil.rmtree(slot_dir, ignore_errors=True)
+            try:
+                self._free_slots.put(self._start_slot())
+            except Exception as e:
+                logger.error(f"Error starting test container: {e}")
+
+        threading.Thread(target=replace, daemon=True).start()
+
+    def _take_slot(self) -> tuple:
+        """Wait for a free container, replacing any that died while it sat in the pool"""
+        deadline = time.monotonic() + _SLOT_WAIT_SECONDS
+        while True:
+            # Raises queue.Empty once the deadline passes
+            container, slot_dir = self._free_slots.get(timeout=max(0.0, deadline - time.monotonic()))
+            try:
+                container.reload()
+                if container.status == 'running':
+                    return container, slot_dir
+            except docker.errors.NotFound:
+                pass
+            except Exception as e:
+                logger.error(f"Error checking test container: {e}")
+            self._recycle(container, slot_dir)
+
+    def _reap_orphans(self):
+        """Remove warm containers left behind by a runner process on this host that has died"""
+        host = socket.gethostname()
+        try:
+            containers = self.client.containers.list(all=True, filters={'label': _RUNNER_LABEL})
+        except Exception as e:
+            logger.error(f"Error listing test containers: {e}")
+            return
+        for container in containers:
+            owner_host, _, pid = container.labels.get(_RUNNER_LABEL, '').rpartition(':')
+            if owner_host != host or not pid.isdigit() or _pid_alive(int(pid)):
+                continue
+            try:
+                self.client.api.remove_container(container.id, force=True)
+            except Exception as e:
+                logger.error(f"Error removing orphaned test container: {e}")
+
+    def ensure_image(self):
+        """Build the test runner image only when it is not already available locally"""
+        image = f"{self.image_name}:{self.image_tag}"
+        try:
+            self.client.images.get(image)
+        except docker.errors.ImageNotFound:
+            logger.info(f"Building Docker image {image}")
+            self.client.images.build(
+                path=os.path.dirname(os.path.abspath(__file__)),
+                tag=image,
+                cache_from=[image],
+                rm=True,
+                forcerm=False
+            )
 
-                # Run container
-                try:
-                    container = self.client.containers.run(
-                        f"{self.image_name}:{self.image_tag}",
-                        command=['bash', 'setup.sh'],
-                        volumes={
-                            temp_dir: {'bind': '/app', 'mode': 'rw'}
-                        },
-                        working_dir='/app',
-                        remove=True,
-                        detach=False,
-                        stdout=True,
-                        stderr=True,
-                        user='1000:1000'  # Run as testuser
-                    )
-                    
-                    output = container.decode('utf-8')
-                    # Filter out pip warnings
-                    output_lines = [
-                        line for line in output.split('\n')
-                        if not line.startswith('WARNING:') and 
-                           not line.startswith('[notice]') and
-                           line.strip()
-                    ]
-                    return '\n'.join(output_lines)
-                    
-                except docker.errors.ContainerError as e:
-                    # Extract actual test output from error
-                    if e.stderr:
-                        error_output = e.stderr.decode('utf-8')
-                        # Filter out pip warnings
-                        error_lines = [
-                            line for line in error_output.split('\n')
-                            if not line.startswith('WARNING:') and 
-                               not line.startswith('[notice]') and
-                               line.strip()
-                        ]
-                        return '\n'.join(error_lines)
-                    raise
+    def close(self):
+        """Stop the warm containers and remove their work directory"""
+        with self._lock:
+            self._closed = True
+            owned = list(self.owned)
+        for container_id in owned:
+            self._remove(container_id)
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def run_test(self, code_content, test_content, on_progress=None):
+        # Take a free container together with its scratch directory; the queue
+        # keeps concurrent runs from sharing a container
+        try:
+            container, slot_dir = self._take_slot()
+        except queue.Empty:
+            return f"Error: no test container became free within {_SLOT_WAIT_SECONDS} seconds"
+
+        lines = []
+        timed_out = threading.Event()
+
+        def expire():
+            timed_out.set()
+            self._remove(container.id)
+
+        watchdog = threading.Timer(_TEST_TIMEOUT + _KILL_GRACE, expire)
+        try:
+            (slot_dir / 'uploaded_code.py').write_text(code_content, encoding='utf-8')
+            (slot_dir / 'test_uploaded_code.py').write_text(test_content, encoding='utf-8')
+
+            # Detect and write requirements
+            package_detector = PackageDetector()
+            required_packages = package_detector.scan_for_imports(code_content)
+            (slot_dir / 'requirements.txt').write_text(
+                ''.join(f"{package}\n" for package in required_packages)
+            )
+
+            # Run inside the warm container and tally results as lines arrive;
+            # output combines stdout and stderr
+            result = container.exec_run(
+                # A hanging suite is killed rather than holding the container
+                ['timeout', '--kill-after=5', str(_TEST_TIMEOUT), 'bash', '/runner/setup.sh'],
+                workdir='/app',
+                stdout=True,
+                stderr=True,
+                stream=True
+            )
+            # Removing the container closes the stream, so the loop below also
+            # ends if the in-container timeout itself is killed or never fires
+            watchdog.start()
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            counts = _new_tally()
+            pending = ''
+            for chunk in result.output:
+                pending += decoder.decode(chunk)
+                *complete, pending = pending.split('\n')
+                for line in complete:
+                    lines.append(line)
+                    _tally_line(counts, line)
+                if complete and on_progress:
+                    on_progress(counts)
+            pending += decoder.decode(b'', final=True)
+            if pending:
+                lines.append(pending)
                 
         except Exception as e:
-            logger.error(f"Docker test execution error: {e}")
-            return f"Error: {str(e)}"
+            if not timed_out.is_set():
+                logger.error(f"Docker test execution error: {e}")
+                return f"Error: {str(e)}"
+        finally:
+            watchdog.cancel()
+            self._recycle(container, slot_dir)
+
+        if timed_out.is_set():
+            lines.append(f"Error: tests did not finish within {_TEST_TIMEOUT} seconds")
+        return _filter_output('\n'.join(lines))
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def get_generator(api_key: str) -> TestGenerator:
+    """
+    Build the test generator once per API key and reuse it across reruns and sessions.
+    Each generator holds clients bound to its own key, so sharing never mixes keys.
+    Only a few keys are kept so clients for abandoned keys are released.
+    """
+    return TestGenerator(api_key)
+
+class _FeedbackFallback(Exception):
+    """Carries canned feedback out of cached_feedback so Streamlit never stores it"""
+    def __init__(self, feedback: dict):
+        super().__init__("AI feedback unavailable")
+        self.feedback = feedback
+
+# In memory only: the generator's own reply cache is the single on-disk layer
+@st.cache_data(show_spinner=False, max_entries=256, ttl=24 * 3600)
+def cached_feedback(code_hash: bytes, output_hash: bytes, _code: str, _output: str, api_key: str) -> dict:
+    """
+    Generate AI feedback once per (code, test output) pair for reruns in this process.
+    The underscored arguments are skipped by Streamlit's hasher; the digests are the key.
+    Fallback feedback is raised rather than returned, so a transient model error is retried.
+    """
+    feedback = get_generator(api_key).generate_feedback(_output, _code)
+    if feedback.get('ai_generated') is False:
+        raise _FeedbackFallback(feedback)
+    return feedback
+
+@st.cache_resource(show_spinner=False)
+def get_test_runner():
+    """
+    Build one test runner per server process and share it across sessions, so the
+    warm Docker pool is started once rather than per browser session.
+    """
+    return DockerTestRunner() if Config.USE_DOCKER else LocalTestRunner()
+
+# Session keys that start out empty, set up on every rerun
+_SESSION_KEYS = (
+    'test_results',
+    'feedback',
+    'code_content',
+    'generated_tests',
+    'current_file',
+    'content_hash',
+    'current_code',
+)
 
 def init_session_state():
-    default_states = {
-        'test_results': None,
-        'feedback': None,
-        'code_content': None,
-        'generated_tests': None,
-        'temp_dir': None,
-        'current_file': None,
-        'current_code': None,
-        'docker_runner': None,
-        'debug_info': []
-    }
-    
-    for key, default_value in default_states.items():
+    for key in _SESSION_KEYS:
         if key not in st.session_state:
-            st.session_state[key] = default_value
-
-    if st.session_state.docker_runner is None:
-        st.session_state.docker_runner = DockerTestRunner()
+            st.session_state[key] = None
+    # Each session gets its own list rather than a shared module-level one
+    if 'debug_info' not in st.session_state:
+        st.session_state.debug_info = []
 
 def reset_state():
-    cleanup()
-    for key in list(sys.modules.keys()):
-        if 'uploaded_code' in key or 'test_uploaded_code' in key:
-            del sys.modules[key]
-    
-    for key in list(st.session_state.keys()):
-        if key != 'docker_runner':
-            del st.session_state[key]
+    st.session_state.clear()
     
     init_session_state()
 
-def generate_basic_feedback(test_output: str) -> dict:
-    total_tests = len(re.findall(r'test_\w+', test_output))
-    passed = len(re.findall(r' \.\.\. ok', test_output))
-    failed = len(re.findall(r' \.\.\. FAIL', test_output))
-    errors = len(re.findall(r' \.\.\. ERROR', test_output))
+def _new_tally() -> dict:
+    return {'passed': 0, 'failed': 0, 'errors': 0, 'ran': None, 'pending': False}
+
+# Verbose unittest status words and the counts they add to
+_OUTCOMES = {'ok': 'passed', 'FAIL': 'failed', 'ERROR': 'errors'}
+
+def _tally_line(counts: dict, line: str) -> None:
+    """Update running counts from one line of verbose unittest output"""
+    _, sep, status = line.rpartition(' ... ')
+    if sep:
+        counts['pending'] = True
+    elif line.startswith('Ran '):
+        counts['pending'] = False
+        try:
+            counts['ran'] = int(line.split()[1])
+        except (IndexError, ValueError):
+            pass
+        return
+    elif counts['pending']:
+        # Output the test printed pushed its status onto a line of its own
+        status = line.strip()
+    else:
+        return
+
+    outcome = _OUTCOMES.get(status)
+    if outcome:
+        counts[outcome] += 1
+        counts['pending'] = False
+    elif status.startswith(('skipped', 'expected failure', 'unexpected success')):
+        counts['pending'] = False
+
+def _parse_unittest_output(text: str) -> dict:
+    """Tally verbose unittest output in a single pass over its lines"""
+    counts = _new_tally()
+    for line in text.splitlines():
+        _tally_line(counts, line)
+
+    passed, failed, errors = counts['passed'], counts['failed'], counts['errors']
+    total = counts['ran'] if counts['ran'] is not None else passed + failed + errors
+
+    return {
+        'total_tests': total,
+        'passed_tests': passed,
+        'failed_tests': failed,
+        'error_tests': errors,
+        'pass_rate': passed / total if total > 0 else 0
+    }
+
+def generate_basic_feedback(test_output: str, summary: dict = None) -> dict:
+    if summary is None:
+        summary = _parse_unittest_output(test_output)
+    total_tests = summary['total_tests']
+    passed = summary['passed_tests']
+    failed = summary['failed_tests']
+    errors = summary['error_tests']
     
     pass_rate = passed / total_tests if total_tests > 0 else 0
     
@@ -244,24 +556,59 @@ def generate_basic_feedback(test_output: str) -> dict:
         }
     }
 
-def save_uploaded_code(code_content):
-    try:
-        if st.session_state.temp_dir and os.path.exists(st.session_state.temp_dir):
-            cleanup()
-        
-        temp_dir = tempfile.mkdtemp()
-        st.session_state.temp_dir = temp_dir
-        
-        code_path = os.path.join(temp_dir, "uploaded_code.py")
-        with open(code_path, "w") as f:
-            f.write(code_content)
-        
-        return temp_dir, code_path
-    except Exception as e:
-        logger.error(f"Error saving code: {e}")
-        return None, None
+def show_error(message: str, error: Exception) -> None:
+    """Show an error once, with its traceback formatted as plain text in a collapsed expander"""
+    st.error(message)
+    with st.expander("Traceback", expanded=False):
+        st.code(''.join(traceback.format_exception(type(error), error, error.__traceback__)))
+
+def _build_results(test_output: str, api_key: str, original_code: str) -> dict:
+    """Parse a test run's output and attach feedback"""
+    # Parse test results
+    summary = _parse_unittest_output(test_output)
+    total_tests = summary['total_tests']
+    passed_tests = summary['passed_tests']
+    failed_tests = summary['failed_tests']
+    error_tests = summary['error_tests']
+    pass_rate = summary['pass_rate']
+
+    if total_tests == 0 or error_tests == total_tests:
+        # Nothing meaningful ran, so skip the AI round-trip
+        feedback = generate_basic_feedback(test_output, summary)
+        feedback['ai_generated'] = False
+    else:
+        try:
+            try:
+                feedback = cached_feedback(
+                    hashlib.blake2b(original_code.encode()).digest(),
+                    hashlib.blake2b(test_output.encode()).digest(),
+                    original_code,
+                    test_output,
+                    api_key
+                )
+            except _FeedbackFallback as fallback:
+                feedback = fallback.feedback
+            # Ensure feedback has all required components
+            if 'summary' not in feedback:
+                feedback['summary'] = {
+                    'total_tests': total_tests,
+                    'passed': passed_tests,
+                    'failed': failed_tests,
+                    'errors': error_tests,
+                    'pass_rate': pass_rate
+                }
+        except Exception as e:
+            logger.error(f"Error generating feedback: {e}")
+            feedback = generate_basic_feedback(test_output, summary)
+
+    return {
+        'output': test_output,
+        'feedback': feedback,
+        'summary': summary,
+        'success': pass_rate == 1.0
+    }
 
-def run_unittest_file(unittest_path: str, generator: TestGenerator, original_code: str, code_dir: str) -> dict:
+def run_unittest_file(test_content: str, api_key: str, original_code: str) -> dict:
     try:
         status_container = st.empty()
         progress_bar = st.progress(0)
@@ -272,57 +619,23 @@ def run_unittest_file(unittest_path: str, generator: TestGenerator, original_cod
             logger.info(message)
 
         update_status("Running tests...", 40)
-        test_output = st.session_state.docker_runner.run_test(
-            original_code,
-            open(unittest_path).read()
+
+        def show_counts(counts: dict):
+            status_container.text(
+                f"Running tests... {counts['passed']} passed, "
+                f"{counts['failed']} failed, {counts['errors']} errors"
+            )
+
+        test_output = get_test_runner().run_test(
+            original_code, test_content, on_progress=show_counts
         )
         
-        update_status("Processing results...", 70)
-        
-        # Parse test results
-        summary_match = re.search(r'Ran (\d+) tests in', test_output)
-        total_tests = int(summary_match.group(1)) if summary_match else 0
-        passed_tests = test_output.count('... ok')
-        failed_tests = len(re.findall(r' \.\.\. FAIL', test_output))
-        error_tests = len(re.findall(r' \.\.\. ERROR', test_output))
-        
-        pass_rate = passed_tests / total_tests if total_tests > 0 else 0
-        
         update_status("Generating feedback...", 85)
-        try:
-            feedback = generator.generate_feedback(test_output, original_code)
-            # Ensure feedback has all required components
-            if 'summary' not in feedback:
-                feedback['summary'] = {
-                    'total_tests': total_tests,
-                    'passed': passed_tests,
-                    'failed': failed_tests,
-                    'errors': error_tests,
-                    'pass_rate': pass_rate
-                }
-        except Exception as e:
-            logger.error(f"Error generating feedback: {e}")
-            feedback = generate_basic_feedback(test_output)
-
-        results = {
-            'output': test_output,
-            'feedback': feedback,
-            'summary': {
-                'total_tests': total_tests,
-                'passed_tests': passed_tests,
-                'failed_tests': failed_tests,
-                'error_tests': error_tests,
-                'pass_rate': pass_rate
-            },
-            'success': pass_rate == 1.0
-        }
-        
-        update_status("Complete", 100)
-        return results
+        return _build_results(test_output, api_key, original_code)
 
     except Exception as e:
         logger.error(f"Error in test execution: {e}")
-        st.error(f"Error running tests: {e}")
+        show_error(f"Error running tests: {e}", e)
         return None
     finally:
         if 'progress_bar' in locals():
@@ -330,6 +643,41 @@ def run_unittest_file(unittest_path: str, generator: TestGenerator, original_cod
         if 'status_container' in locals():
             status_container.empty()
 
+_SEVERITY_COLORS = {
+    'High': '#F44336',
+    'Medium': '#FF9800',
+    'Low': '#4CAF50'
+}
+
+# Markdown code spans: a run of backticks up to the next run of the same length
+_CODE_SPAN_RE = re.compile(r'(`+).+?(?<!`)\1(?!`)', re.S)
+
+def _escape_html_outside_code(text: str) -> str:
+    """Escape HTML in markdown text, leaving code spans alone since markdown shows them literally"""
+    parts = []
+    end = 0
+    for match in _CODE_SPAN_RE.finditer(text):
+        parts.append(html.escape(text[end:match.start()]))
+        parts.append(match.group())
+        end = match.end()
+    parts.append(html.escape(text[end:]))
+    return ''.join(parts)
+
+def _fmt_issue(issue: dict) -> str:
+    """Format one issue as a separator, severity badge, description and fix"""
+    severity = issue.get('severity', 'Unknown')
+    # The block renders with unsafe_allow_html, so model text is escaped; only the badge is HTML
+    description = _escape_html_outside_code(str(issue.get('description', 'No description available.')))
+    fix = _escape_html_outside_code(str(issue.get('fix', 'No fix suggestion available.')))
+    return (
+        "---\n\n"
+        "<div style='display: inline-block; padding: 4px 12px; border-radius: 15px; "
+        f"background-color: {_SEVERITY_COLORS.get(severity, '#757575')}; color: white; "
+        "font-size: 12px; margin-bottom: 10px;'>"
+        f"{html.escape(str(severity))} Severity</div>\n\n"
+        f"**Description:** {description}\n\n"
+        f"**Fix:** {fix}"
+    )
 
 def display_feedback(feedback):
     """Display formatted feedback with all components"""
@@ -367,61 +715,62 @@ def display_feedback(feedback):
         # Display identified issues without expanders
         if feedback.get('issues'):
             st.markdown("### 🔍 Identified Issues")
-            for issue in feedback['issues']:
-                st.markdown("---")  # Add separator between issues
-                # Create container for each issue
-                with st.container():
-                    # Add severity indicator
-                    severity_color = {
-                        'High': '#F44336',
-                        'Medium': '#FF9800',
-                        'Low': '#4CAF50'
-                    }.get(issue.get('severity', 'Unknown'), '#757575')
-                    
-                    st.markdown(f"""
-                        <div style='
-                            display: inline-block;
-                            padding: 4px 12px;
-                            border-radius: 15px;
-                            background-color: {severity_color};
-                            color: white;
-                            font-size: 12px;
-                            margin-bottom: 10px;'>
-                            {issue.get('severity', 'Unknown')} Severity
-                        </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # Display issue description and fix
-                    st.markdown(f"**Description:** {issue.get('description', 'No description available.')}")
-                    st.markdown(f"**Fix:** {issue.get('fix', 'No fix suggestion available.')}")
+            # Render every issue in a single markdown block
+            st.markdown(
+                "\n\n".join(_fmt_issue(issue) for issue in feedback['issues']),
+                unsafe_allow_html=True
+            )
 
     except Exception as e:
         logger.error(f"Error displaying feedback: {e}")
         st.error("Error displaying feedback. Please check the logs.")
 
-def cleanup():
-    try:
-        if st.session_state.temp_dir and st.session_state.temp_dir in sys.path:
-            sys.path.remove(st.session_state.temp_dir)
-        
-        if st.session_state.temp_dir and os.path.exists(st.session_state.temp_dir):
-            shutil.rmtree(st.session_state.temp_dir)
-            st.session_state.temp_dir = None
-        
-        for key in list(sys.modules.keys()):
-            if 'uploaded_code' in key or 'test_uploaded_code' in key:
-                del sys.modules[key]
-                
-        if st.session_state.docker_runner:
-            client = st.session_state.docker_runner.client
-            for container in client.containers.list(all=True):
-                if container.name.startswith('test_'):
-                    try:
-                        container.remove(force=True)
-                    except:
-                        pass
-    except Exception as e:
-        logger.error(f"Error during cleanup: {e}")
+@st.fragment
+def render_generated_tests(api_key: str) -> None:
+    """Render the generated tests tab; its widgets rerun only this fragment"""
+    if st.session_state.generated_tests:
+        st.header("Generated Test Cases")
+
+        with st.expander("Test Cases (JSON)", expanded=True):
+            st.json(st.session_state.generated_tests['test_cases'])
+
+        with st.expander("Generated Unittest Code", expanded=True):
+            st.code(st.session_state.generated_tests['unittest_code'], language="python")
+
+        if st.button("Run Tests"):
+            with st.spinner("Running tests..."):
+                try:
+                    results = run_unittest_file(
+                        st.session_state.generated_tests['unittest_code'],
+                        api_key,
+                        st.session_state.code_content
+                    )
+
+                    if results:
+                        st.session_state.test_results = results
+                        st.toast("Tests completed!")
+                        # Results live in another tab, so refresh the whole app once
+                        st.rerun()
+
+                except Exception as e:
+                    logger.error(f"Error running tests: {e}")
+                    show_error(f"Error running tests: {e}", e)
+
+@st.fragment
+def render_test_results() -> None:
+    """Render the results tab; its widgets rerun only this fragment"""
+    if st.session_state.test_results:
+        st.header("Test Results")
+
+        # Raw test output in expander
+        with st.expander("Raw Test Output", expanded=False):
+            st.text(st.session_state.test_results['output'])
+
+        # Display formatted feedback
+        if st.session_state.test_results.get('feedback'):
+            display_feedback(st.session_state.test_results['feedback'])
+        else:
+            st.error("No feedback available")
 
 def main():
     st.set_page_config(
@@ -446,13 +795,7 @@ def main():
     
         st.markdown("---")
         st.markdown("### About")
-        st.markdown("""
-        This tool uses AI to:
-        - Generate unit tests
-        - Analyze code quality
-        - Provide detailed feedback
-        - Suggest improvements
-        """)
+        st.markdown(_ABOUT_MD)
 
     tab1, tab2, tab3 = st.tabs(["Code Input", "Generated Tests", "Results"])
     
@@ -467,11 +810,27 @@ def main():
         if input_method == "Upload Python File":
             uploaded_file = st.file_uploader("Upload Python file", type=["py"])
             if uploaded_file:
-                if st.session_state.current_file != uploaded_file.name:
+                # Hash the raw upload buffer; only a content change resets state and decodes
+                raw_bytes = uploaded_file.getbuffer()
+                content_hash = hashlib.blake2b(raw_bytes, digest_size=16).digest()
+                if st.session_state.content_hash != content_hash:
                     reset_state()
+                    st.session_state.content_hash = content_hash
                     st.session_state.current_file = uploaded_file.name
-                st.session_state.code_content = uploaded_file.getvalue().decode("utf-8")
-                st.code(st.session_state.code_content, language="python")
+                    st.session_state.code_content = str(raw_bytes, "utf-8")
+                with st.expander("Preview uploaded code", expanded=False):
+                    code_content = st.session_state.code_content
+                    if len(code_content) > _PREVIEW_MAX_CHARS:
+                        # Cut by lines, then by characters for files with very long lines
+                        preview = '\n'.join(code_content.splitlines()[:_PREVIEW_MAX_LINES])[:_PREVIEW_MAX_CHARS]
+                        st.code(preview, language="python")
+                        st.download_button(
+                            "Download full file",
+                            code_content,
+                            file_name=uploaded_file.name
+                        )
+                    else:
+                        st.code(code_content, language="python")
         else:
             current_code = st.text_area(
                 "Paste your Python code here",
@@ -484,7 +843,6 @@ def main():
                 st.session_state.code_content = current_code
 
         if st.button("Generate Tests", disabled=not (api_key and st.session_state.code_content)):
-            cleanup()
             st.session_state.generated_tests = None
             st.session_state.test_results = None
 
@@ -496,7 +854,7 @@ def main():
             
             with st.spinner("Generating tests..."):
                 try:
-                    generator = TestGenerator(api_key)
+                    generator = get_generator(api_key)
                     results = generator.process_code(st.session_state.code_content, "uploaded_code.py")
                     if results:
                         st.session_state.generated_tests = results
@@ -508,60 +866,10 @@ def main():
                     st.error(f"Error: {str(e)}")
 
     with tab2:
-        if st.session_state.generated_tests:
-            st.header("Generated Test Cases")
-            
-            with st.expander("Test Cases (JSON)", expanded=True):
-                st.json(st.session_state.generated_tests['test_cases'])
-            
-            with st.expander("Generated Unittest Code", expanded=True):
-                st.code(st.session_state.generated_tests['unittest_code'], language="python")
-            
-            if st.button("Run Tests"):
-                with st.spinner("Running tests..."):
-                    try:
-                        temp_dir, code_path = save_uploaded_code(st.session_state.code_content)
-                        if not temp_dir or not code_path:
-                            st.error("Failed to save code file")
-                            return
-
-                        test_path = os.path.join(temp_dir, "test_uploaded_code.py")
-                        with open(test_path, "w") as f:
-                            f.write(st.session_state.generated_tests['unittest_code'])
-                        
-                        init_path = os.path.join(temp_dir, "__init__.py")
-                        with open(init_path, "w") as f:
-                            f.write("")
-                        
-                        generator = TestGenerator(api_key)
-                        results = run_unittest_file(
-                            test_path,
-                            generator,
-                            st.session_state.code_content,
-                            temp_dir
-                        )
-                        
-                        if results:
-                            st.session_state.test_results = results
-                            st.success("Tests completed!")
-                        
-                    except Exception as e:
-                        logger.error(f"Error running tests: {e}")
-                        st.error(f"Error running tests: {e}")
+        render_generated_tests(api_key)
 
     with tab3:
-        if st.session_state.test_results:
-            st.header("Test Results")
-        
-            # Raw test output in expander
-            with st.expander("Raw Test Output", expanded=False):
-                st.text(st.session_state.test_results['output'])
-        
-            # Display formatted feedback
-            if st.session_state.test_results.get('feedback'):
-                display_feedback(st.session_state.test_results['feedback'])
-            else:
-                st.error("No feedback available")
+        render_test_results()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -11,6 +11,13 @@ class Config:
     # File paths and directories
     OUTPUT_DIR: str = 'output'
     TEST_DIR: str = 'tests'
+    PERSIST_ARTIFACTS: bool = os.getenv('PERSIST_ARTIFACTS', 'false').lower() == 'true'
+    CACHE_DIR: str = os.getenv('CACHE_DIR', '.cache')
+    # Reuse generated tests for structurally similar code via embeddings (opt-in)
+    SEMANTIC_CACHE: bool = os.getenv('SEMANTIC_CACHE', 'false').lower() == 'true'
+
+    # Test execution settings
+    USE_DOCKER: bool = os.getenv('USE_DOCKER', 'false').lower() == 'true'
     
     # Test generation settings
     MAX_TEST_CASES: int = 10
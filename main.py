@@ -1,80 +1,230 @@
 import os
-import json
-import unittest
+import sys
+import types
+import tempfile
+import marshal
+import py_compile
 import importlib.util
-from dotenv import load_dotenv
-from src.test_generator import TestGenerator
+import unittest
+import functools
+import contextlib
+from io import StringIO
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
+from src import _json_compat
 from config.config import Config
 
-def run_unittest_file(unittest_path: str, generator: TestGenerator, original_code: str) -> tuple:
+if TYPE_CHECKING:
+    from src.test_generator import TestGenerator
+
+class StreamingResult(unittest.TextTestResult):
+    """Test result that reports each test's outcome as soon as it finishes"""
+    def __init__(self, stream, descriptions, verbosity, callback=print, **kwargs):
+        super().__init__(stream, descriptions, verbosity, **kwargs)
+        self._cb = callback
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self._cb(f"ok {test}")
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._cb(f"FAIL {test}")
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self._cb(f"ERROR {test}")
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._cb(f"skipped {test}")
+
+# Loaders are stateless across suites; runners bind to a fresh stream per run
+_LOADER = unittest.TestLoader()
+_RUNNER_OPTIONS = {
+    'verbosity': 2,
+    'resultclass': functools.partial(StreamingResult, callback=functools.partial(print, flush=True))
+}
+
+def _compiled_code(unittest_path: str, source: bytes, stat: os.stat_result) -> types.CodeType:
     """
-    Run the generated unittest file and return the test results and output
+    Return the test module's code object, unmarshalling the bytecode written at
+    generation time when its header still matches the source, else compiling it
     """
     try:
-        # Get the directory and file name
-        directory = os.path.dirname(unittest_path)
-        file_name = os.path.basename(unittest_path)
-        module_name = os.path.splitext(file_name)[0]
+        with open(unittest_path + 'c', 'rb') as f:
+            data = f.read()
+        # Timestamp-based pyc header: magic, flags, source mtime, source size
+        if (data[:4] == importlib.util.MAGIC_NUMBER
+                and int.from_bytes(data[4:8], 'little') == 0
+                and int.from_bytes(data[8:12], 'little') == int(stat.st_mtime) & 0xFFFFFFFF
+                and int.from_bytes(data[12:16], 'little') == stat.st_size & 0xFFFFFFFF):
+            return marshal.loads(data[16:])
+    except (OSError, ValueError, EOFError, TypeError):
+        pass
+    return compile(source, unittest_path, 'exec')
+
+def _load_test_module(unittest_path: str, module_name: str) -> types.ModuleType:
+    """
+    Execute the test module's code into a fresh module, so every run imports the
+    current code under test. Only the compile step is saved, via the pyc written
+    at generation time; main() runs one test file per process, so executed
+    modules are never worth keeping.
+    """
+    stat = os.stat(unittest_path)
+    with open(unittest_path, 'rb') as f:
+        source = f.read()
+
+    test_module = types.ModuleType(module_name)
+    test_module.__file__ = unittest_path
+    exec(_compiled_code(unittest_path, source, stat), test_module.__dict__)
+    return test_module
+
+def _umask() -> int:
+    """Return the process umask; it can only be read by setting it"""
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
 
-        # Add the directory to Python path
-        import sys
-        if directory not in sys.path:
-            sys.path.insert(0, directory)
+def _write_bytes(path: str, payload: bytes) -> bool:
+    """
+    Atomically replace a file with the payload. Returns False without writing
+    when the file already holds it.
+    """
+    try:
+        if os.path.getsize(path) == len(payload):
+            with open(path, 'rb') as f:
+                if f.read() == payload:
+                    return False
+    except OSError:
+        pass
 
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            # mkstemp creates files owner-only; give the file the mode open() would
+            os.chmod(tmp_path, 0o666 & ~_umask())
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return True
+
+@contextlib.contextmanager
+def _extended_syspath(*dirs: str):
+    """Temporarily prepend directories to sys.path, restoring it on exit"""
+    saved_path = sys.path[:]
+    sys.path[:0] = [d for d in dirs if d not in sys.path]
+    try:
+        yield
+    finally:
+        sys.path[:] = saved_path
+
+@functools.lru_cache(maxsize=1)
+def _get_executor() -> ProcessPoolExecutor:
+    """Create the worker pool used to run generated tests, once per process"""
+    return ProcessPoolExecutor(max_workers=2)
+
+def _run_tests(unittest_path: str, directory: str) -> tuple:
+    """
+    Import and run the generated tests inside a worker process and return
+    a picklable (summary, output) pair. The summary is tallied by the result
+    object; the output is the runner's full log, for the feedback prompt.
+    """
+    module_name = os.path.splitext(os.path.basename(unittest_path))[0]
+
+    loaded_before = set(sys.modules)
+    path_before = set(sys.path)
+    # Add the directory to Python path for the duration of the run only
+    with _extended_syspath(directory):
         # Import the test module
-        spec = importlib.util.spec_from_file_location(module_name, unittest_path)
-        test_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(test_module)
+        test_module = _load_test_module(unittest_path, module_name)
 
         # Create test suite and runner
-        loader = unittest.TestLoader()
-        suite = loader.loadTestsFromModule(test_module)
-        
+        suite = _LOADER.loadTestsFromModule(test_module)
+
         # Capture test output
-        from io import StringIO
         output_stream = StringIO()
-        runner = unittest.TextTestRunner(stream=output_stream, verbosity=2)
+        runner = unittest.TextTestRunner(stream=output_stream, **_RUNNER_OPTIONS)
+        result = runner.run(suite)
+        # The generated tests append the code's own directory to sys.path themselves
+        added_dirs = tuple(os.path.join(os.path.abspath(entry), '') for entry in set(sys.path) - path_before)
+    sys.modules.pop(module_name, None)
+    # Forget the code under test too, so a reused worker never runs a stale import
+    for name in set(sys.modules) - loaded_before:
+        module_file = getattr(sys.modules[name], '__file__', None)
+        if module_file and os.path.abspath(module_file).startswith(added_dirs):
+            del sys.modules[name]
+
+    summary = {
+        'tests_run': result.testsRun,
+        'failures': len(result.failures),
+        'errors': len(result.errors),
+        'skipped': len(result.skipped)
+    }
+    return summary, output_stream.getvalue()
+
+def run_unittest_file(unittest_path: str, generator: 'TestGenerator', original_code: str) -> tuple:
+    """
+    Run the generated unittest file and return the test results and output
+    """
+    try:
+        # Get the directory and file name
+        directory = os.path.dirname(unittest_path)
+        file_name = os.path.basename(unittest_path)
+        module_name = os.path.splitext(file_name)[0]
 
         print("\n=== Running Tests ===")
-        result = runner.run(suite)
-        test_output = output_stream.getvalue()
+        future = _get_executor().submit(_run_tests, unittest_path, directory)
+        summary, test_output = future.result()
         
         # Generate feedback
         print("\n=== Generating Feedback ===")
-        feedback = generator.generate_feedback(test_output, original_code)
+        if summary['tests_run'] == 0 or summary['errors'] == summary['tests_run']:
+            # Nothing meaningful ran, so skip the AI round-trip
+            feedback = generator._generate_calculated_feedback(
+                summary['tests_run'], 0, summary['failures'], summary['errors']
+            )
+        else:
+            passed = summary['tests_run'] - summary['failures'] - summary['errors'] - summary['skipped']
+            feedback = generator.generate_feedback(test_output, original_code, summary={
+                'total_tests': summary['tests_run'],
+                'passed': passed,
+                'failed': summary['failures'],
+                'errors': summary['errors']
+            })
         
         # Print test summary
-        print("\n=== Test Summary ===")
-        print(f"Tests run: {result.testsRun}")
-        print(f"Failures: {len(result.failures)}")
-        print(f"Errors: {len(result.errors)}")
-        print(f"Skipped: {len(result.skipped)}")
-        
-        # Print feedback
-        print("\n=== Code Analysis Feedback ===")
-        print(f"Overall Score: {feedback['score']}/5.0")
-        print(f"Code Quality: {feedback['code_quality']['complexity']} complexity, {feedback['code_quality']['maintainability']} maintainability")
-        print(f"Test Coverage: {feedback['code_quality']['test_coverage']}")
-        
-        print("\nStrengths:")
-        for strength in feedback['detailed_feedback']['strengths']:
-            print(f"✓ {strength}")
-        
-        print("\nAreas for Improvement:")
-        for weakness in feedback['detailed_feedback']['weaknesses']:
-            print(f"! {weakness}")
-        
-        print("\nRecommendations:")
-        for rec in feedback['detailed_feedback']['recommendations']:
-            print(f"→ {rec}")
+        # Build the summary and feedback report, then write it in one call
+        buf = [
+            "\n=== Test Summary ===",
+            f"Tests run: {summary['tests_run']}",
+            f"Failures: {summary['failures']}",
+            f"Errors: {summary['errors']}",
+            f"Skipped: {summary['skipped']}",
+            "\n=== Code Analysis Feedback ===",
+            f"Overall Score: {feedback['score']}/5.0",
+            f"Code Quality: {feedback['code_quality']['complexity']} complexity, {feedback['code_quality']['maintainability']} maintainability",
+            f"Test Coverage: {feedback['code_quality']['test_coverage']}",
+            "\nStrengths:"
+        ]
+        buf.extend(f"✓ {strength}" for strength in feedback['detailed_feedback']['strengths'])
+        buf.append("\nAreas for Improvement:")
+        buf.extend(f"! {weakness}" for weakness in feedback['detailed_feedback']['weaknesses'])
+        buf.append("\nRecommendations:")
+        buf.extend(f"→ {rec}" for rec in feedback['detailed_feedback']['recommendations'])
+        sys.stdout.write("\n".join(buf) + "\n")
         
-        # Save feedback to file
-        feedback_path = os.path.join(directory, f"{module_name}_feedback.json")
-        with open(feedback_path, 'w') as f:
-            json.dump(feedback, f, indent=2)
-        print(f"\n✓ Detailed feedback saved to: {feedback_path}")
+        # Save feedback to file when artifact persistence is enabled
+        if Config.PERSIST_ARTIFACTS:
+            feedback_path = os.path.join(directory, f"{module_name}_feedback.json")
+            if _write_bytes(feedback_path, _json_compat.dump_bytes(feedback, indent=True)):
+                print(f"\n✓ Detailed feedback saved to: {feedback_path}")
+            else:
+                print(f"\n✓ Detailed feedback unchanged: {feedback_path}")
         
-        return len(result.failures) == 0 and len(result.errors) == 0, feedback
+        return summary['failures'] == 0 and summary['errors'] == 0, feedback
 
     except Exception as e:
         print(f"Error running tests: {e}")
@@ -82,6 +232,7 @@ def run_unittest_file(unittest_path: str, generator: TestGenerator, original_cod
 
 def main():
     # Load environment variables
+    from dotenv import load_dotenv
     load_dotenv()
     
     print("\n=== Test Generator Starting ===")
@@ -98,7 +249,8 @@ def main():
     Config.create_directories()
     print("✓ Directories created")
 
-    # Initialize test generator
+    # Initialize test generator; the Gemini SDK is only imported once configuration is valid
+    from src.test_generator import TestGenerator
     print(f"\nInitializing test generator with API key: {Config.GOOGLE_API_KEY[:8]}...")
     generator = TestGenerator(Config.GOOGLE_API_KEY)
     print("✓ Test generator initialized")
@@ -128,19 +280,23 @@ def main():
         
         # Save test cases
         test_cases_path = os.path.join(output_dir, f"{base_name}_test_cases.json")
-        with open(test_cases_path, 'w') as f:
-            json.dump(results['test_cases'], f, indent=4)
+        _write_bytes(test_cases_path, _json_compat.dump_bytes(results['test_cases'], indent=True))
         print(f"✓ Test cases saved to: {test_cases_path}")
         
         # Save unittest code
         unittest_path = os.path.join(output_dir, f"{base_name}_test.py")
         with open(unittest_path, 'w') as f:
             f.write(results['unittest_code'])
+        # Compile ahead of the test run so loading the tests skips the compile step
+        try:
+            py_compile.compile(unittest_path, cfile=unittest_path + 'c', doraise=True)
+        except py_compile.PyCompileError as e:
+            print(f"✗ Could not precompile tests: {e.msg}")
         print(f"✓ Unittest code saved to: {unittest_path}")
         
         print("\n=== Generated Files Content ===")
         print("\nTest Cases (JSON):")
-        print(json.dumps(results['test_cases'], indent=2))
+        print(_json_compat.dumps(results['test_cases'], indent=True))
         print("\nUnittest Code:")
         print(results['unittest_code'])
         
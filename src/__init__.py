@@ -1,8 +1,25 @@
 # This file can be empty or contain package-level imports and variables
-from .test_generator import TestGenerator
-from .code_analyzer import CodeAnalyzer
-from .test_case_generator import TestCaseGenerator
-from .unittest_generator import UnittestGenerator
-from .result_analyzer import ResultAnalyzer
+import importlib
 
-__version__ = '0.1.0'
\ No newline at end of file
+# Public classes are imported on first access so that importing one submodule
+# does not pull in the Gemini SDK through the others
+_EXPORTS = {
+    'TestGenerator': '.test_generator',
+    'CodeAnalyzer': '.code_analyzer',
+    'TestCaseGenerator': '.test_case_generator',
+    'UnittestGenerator': '.unittest_generator',
+    'ResultAnalyzer': '.result_analyzer',
+    'BatchedModel': '.batched_model',
+    'CombinedGenerator': '.combined_generator',
+}
+
+__all__ = list(_EXPORTS)
+
+__version__ = '0.1.0'
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -0,0 +1,85 @@
+# src/_cache.py
+
+import os
+import hashlib
+import tempfile
+from collections import OrderedDict
+from typing import Any, Optional
+from config.config import Config
+from . import _json_compat
+
+class DiskCache:
+    """
+    Content-addressed cache for deterministic model results. Entries are keyed by a
+    blake2b hash of the input text, kept in a small in-process LRU in front of JSON
+    files under Config.CACHE_DIR. At most max_files files are kept per kind; the
+    least recently used ones are deleted as new entries are written.
+    """
+    def __init__(self, kind: str, memory_size: int = 32, max_files: int = 512):
+        self.kind = kind
+        self.memory_size = memory_size
+        self.max_files = max_files
+        self._memory = OrderedDict()
+
+    def _key(self, text: str) -> str:
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(Config.CACHE_DIR, f"{key}-{self.kind}.json")
+
+    def _remember(self, key: str, value: Any) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, text: str) -> Optional[Any]:
+        """Return the cached result for text, or None on a miss"""
+        key = self._key(text)
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = _json_compat.loads(f.read())
+            # Mark the file as recently used, so eviction keeps it
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        self._remember(key, value)
+        return value
+
+    def _evict(self) -> None:
+        """Delete the least recently used files of this kind beyond max_files"""
+        suffix = f"-{self.kind}.json"
+        entries = []
+        with os.scandir(Config.CACHE_DIR) as it:
+            for entry in it:
+                if entry.name.endswith(suffix):
+                    try:
+                        entries.append((entry.stat().st_mtime, entry.path))
+                    except OSError:
+                        pass
+        if len(entries) <= self.max_files:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_files]:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def put(self, text: str, value: Any) -> None:
+        """Store a result for text, writing the file atomically"""
+        key = self._key(text)
+        self._remember(key, value)
+        try:
+            os.makedirs(Config.CACHE_DIR, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=Config.CACHE_DIR, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_json_compat.dump_bytes(value))
+            os.replace(tmp_path, self._path(key))
+            self._evict()
+        except (OSError, TypeError) as e:
+            print(f"Error writing cache entry: {e}")
\ No newline at end of file
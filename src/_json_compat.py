@@ -0,0 +1,25 @@
+# src/_json_compat.py
+
+import json
+
+# orjson is an optional speedup; fall back to the standard library without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def loads(data):
+    """Parse JSON from str or bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dump_bytes(obj, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes, indented by two spaces when requested"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode('utf-8')
+
+def dumps(obj, indent: bool = False) -> str:
+    """Serialize to a JSON string, indented by two spaces when requested"""
+    return dump_bytes(obj, indent).decode('utf-8')
\ No newline at end of file
@@ -0,0 +1,21 @@
+# src/_json_extract.py
+
+def extract_json_block(text: str) -> str:
+    """
+    Return the JSON payload of an LLM reply: the first ```json fence, else the
+    first plain ``` fence, else the outermost braces. Scans with find() and
+    slices once instead of splitting the whole reply.
+    """
+    fence = text.find("```")
+    if fence < 0:
+        return text[text.find('{'):text.rfind('}') + 1]
+
+    # Common case: the first fence is the json one, found in the same scan
+    if text.startswith("json", fence + 3):
+        start = fence + len("```json")
+    else:
+        json_fence = text.find("```json", fence + 3)
+        start = json_fence + len("```json") if json_fence >= 0 else fence + len("```")
+
+    end = text.find("```", start)
+    return text[start:end if end >= 0 else len(text)].strip()
\ No newline at end of file
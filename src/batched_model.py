@@ -0,0 +1,26 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+class BatchedModel:
+    def __init__(self, model, max_workers: int = 3):
+        self.model = model
+        self.max_workers = max_workers
+
+    def generate_content(self, prompt: str):
+        """Pass a single prompt straight through to the wrapped model"""
+        return self.model.generate_content(prompt)
+
+    def generate_many(self, prompts: List[str]) -> List:
+        """
+        Send independent prompts concurrently, so the wait is the slowest call
+        rather than the sum of all of them. Each entry is the response text, or
+        the exception raised for that prompt.
+        """
+        def generate(prompt):
+            try:
+                return self.model.generate_content(prompt).text
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(prompts) or 1)) as executor:
+            return list(executor.map(generate, prompts))
\ No newline at end of file
@@ -1,14 +1,47 @@
-import json
 import re
 from typing import Dict, Optional
+from . import _json_compat
+from ._json_extract import extract_json_block
+from ._cache import DiskCache
+
+# Patterns used on every parse, compiled once at import time
+_KEY_QUOTE_RE = re.compile(r'(?<!\\)"(\w+)":')
+_CLASS_RE = re.compile(r'class\s+(\w+):')
+_IMPORT_RE = re.compile(r'import\s+(\w+)|from\s+(\w+)')
+
+# Parsed analyses keyed by the code they describe
+_ANALYSIS_CACHE = DiskCache('analyze')
+# Bump whenever the analysis prompt or result schema changes, so stale entries are never read
+_ANALYSIS_VERSION = 1
 
 class CodeAnalyzer:
     def __init__(self, model):
         self.model = model
 
+    def _cache_key(self, code: str) -> str:
+        """Key an analysis by schema version and model as well as the code"""
+        return f"v{_ANALYSIS_VERSION}:{getattr(self.model, 'model_name', '')}:{code}"
+
     def analyze_code(self, code: str) -> Dict:
         """Analyze code to determine its structure and requirements"""
-        prompt = f"""
+        cached = _ANALYSIS_CACHE.get(self._cache_key(code))
+        if cached is not None:
+            return cached
+
+        prompt = self._generate_prompt(code)
+
+        try:
+            response = self.model.generate_content(prompt)
+            analysis = self._parse_analysis_response(response.text)
+            _ANALYSIS_CACHE.put(self._cache_key(code), analysis)
+            return analysis
+        except Exception as e:
+            print(f"Error in code analysis: {e}")
+            return self._generate_basic_analysis(code)
+
+    def _generate_prompt(self, code: str) -> str:
+        """Build the analysis prompt for the given code"""
+        return f"""
         Analyze this Python code and provide information about its structure.
         Return ONLY a JSON object in this exact format:
         {{
@@ -55,29 +88,18 @@ class CodeAnalyzer:
         ```
         """
 
-        try:
-            response = self.model.generate_content(prompt)
-            return self._parse_analysis_response(response.text)
-        except Exception as e:
-            print(f"Error in code analysis: {e}")
-            return self._generate_basic_analysis(code)
-
     def _parse_analysis_response(self, response_text: str) -> Dict:
         """Parse the LLM response into a structured format"""
         # Extract JSON content
-        if "```json" in response_text:
-            json_str = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            json_str = response_text.split("```")[1].strip()
-        else:
-            start = response_text.find('{')
-            end = response_text.rfind('}') + 1
-            json_str = response_text[start:end]
+        json_str = extract_json_block(response_text)
 
-        # Clean up and parse JSON
-        json_str = re.sub(r'(?<!\\)"(\w+)":', r'"\1":', json_str)
-        json_str = json_str.replace("'", '"')
-        return json.loads(json_str)
+        # Most replies are already valid JSON; only rewrite the string when they are not
+        try:
+            return _json_compat.loads(json_str)
+        except ValueError:
+            json_str = _KEY_QUOTE_RE.sub(r'"\1":', json_str)
+            json_str = json_str.replace("'", '"')
+            return _json_compat.loads(json_str)
 
     def _generate_basic_analysis(self, code: str) -> Dict:
         """Generate basic code analysis when LLM fails"""
@@ -88,7 +110,7 @@ class CodeAnalyzer:
         }
 
         # Find classes
-        class_matches = re.finditer(r'class\s+(\w+):', code)
+        class_matches = _CLASS_RE.finditer(code)
         for match in class_matches:
             class_name = match.group(1)
             analysis["classes"].append({
@@ -96,11 +118,9 @@ class CodeAnalyzer:
                 "methods": []
             })
 
-        # Find imports
-        import_matches = re.finditer(r'import\s+(\w+)|from\s+(\w+)', code)
-        for match in import_matches:
-            dep = match.group(1) or match.group(2)
-            if dep not in analysis["dependencies"]:
-                analysis["dependencies"].append(dep)
+        # Find imports, deduplicated in first-seen order
+        analysis["dependencies"] = list(dict.fromkeys(
+            match.group(1) or match.group(2) for match in _IMPORT_RE.finditer(code)
+        ))
 
         return analysis
\ No newline at end of file
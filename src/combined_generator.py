@@ -0,0 +1,119 @@
+from typing import Dict, Tuple
+from .code_analyzer import CodeAnalyzer, _ANALYSIS_CACHE
+from .test_case_generator import TestCaseGenerator, _TEST_CASES_CACHE
+
+class CombinedGenerator:
+    def __init__(self, model):
+        self.model = model
+        self.analyzer = CodeAnalyzer(model)
+        self.case_generator = TestCaseGenerator(model)
+
+    def analyze_and_generate(self, code: str) -> Tuple[Dict, Dict]:
+        """
+        Analyze code and generate its test cases with a single model call, sending
+        the code once. Returns the same shapes as analyze_code and generate_test_cases.
+        """
+        analysis_key = self.analyzer._cache_key(code)
+        test_cases_key = self.case_generator._cache_key(code)
+        analysis = _ANALYSIS_CACHE.get(analysis_key)
+        test_cases = _TEST_CASES_CACHE.get(test_cases_key)
+        if analysis is not None and test_cases is not None:
+            return analysis, test_cases
+
+        try:
+            response = self.model.generate_content(self._generate_prompt(code))
+            # Both parsers share the same extraction and cleanup, so either can read the combined reply
+            combined = self.analyzer._parse_analysis_response(response.text)
+        except Exception as e:
+            print(f"Error in combined analysis: {e}")
+            combined = {}
+
+        if analysis is None:
+            analysis = combined.get('analysis')
+            if isinstance(analysis, dict):
+                _ANALYSIS_CACHE.put(analysis_key, analysis)
+            else:
+                analysis = self.analyzer._generate_basic_analysis(code)
+
+        if test_cases is None:
+            test_cases = combined.get('test_cases')
+            if isinstance(test_cases, dict):
+                _TEST_CASES_CACHE.put(test_cases_key, test_cases)
+            else:
+                test_cases = self.case_generator._generate_basic_test_cases(code)
+
+        return analysis, test_cases
+
+    def _generate_prompt(self, code: str) -> str:
+        """Build one prompt that asks for both the analysis and the test cases"""
+        return f"""
+        Analyze this Python code and generate comprehensive test cases for it.
+        Return ONLY a JSON object in this exact format:
+        {{
+            "analysis": {{
+                "functions": [
+                    {{
+                        "name": "function_name",
+                        "parameters": [
+                            {{
+                                "name": "parameter_name",
+                                "type": "parameter_type"
+                            }}
+                        ],
+                        "return_type": "return_type",
+                        "description": "function description"
+                    }}
+                ],
+                "classes": [
+                    {{
+                        "name": "class_name",
+                        "methods": [
+                            {{
+                                "name": "method_name",
+                                "parameters": [
+                                    {{
+                                        "name": "parameter_name",
+                                        "type": "parameter_type"
+                                    }}
+                                ],
+                                "return_type": "return_type",
+                                "description": "method description"
+                            }}
+                        ]
+                    }}
+                ],
+                "dependencies": [
+                    "required_package_1"
+                ]
+            }},
+            "test_cases": {{
+                "test_cases": [
+                    {{
+                        "name": "test_name",
+                        "category": "happy_path",
+                        "function": "function_name",
+                        "inputs": {{
+                            "param1": "value1"
+                        }},
+                        "expected_output": "expected_result",
+                        "description": "test description"
+                    }}
+                ],
+                "setup": {{
+                    "imports": ["required_import1"],
+                    "fixtures": ["fixture1"]
+                }}
+            }}
+        }}
+
+        Code:
+        ```python
+        {code}
+        ```
+
+        Include test cases for:
+        1. Basic functionality (happy paths)
+        2. Edge cases
+        3. Error cases
+        4. Input validation
+        """
\ No newline at end of file
@@ -1,6 +1,16 @@
-import json
 import re
+from collections import Counter
 from typing import Dict
+from . import _json_compat
+
+# google-re2 is an optional speedup: a linear-time DFA engine for large outputs
+try:
+    import re2 as _regex
+except ImportError:
+    _regex = re
+
+# Matches each verbose unittest result, capturing its outcome
+_RESULT_RE = _regex.compile(r'\.{3} (ok|FAIL|ERROR)')
 
 class ResultAnalyzer:
     def __init__(self, model):
@@ -37,15 +47,18 @@ class ResultAnalyzer:
 
         try:
             response = self.model.generate_content(prompt)
-            return json.loads(response.text)
+            return _json_compat.loads(response.text)
         except Exception as e:
             print(f"Error analyzing results: {e}")
             return self._generate_fallback_analysis(test_output)
 
     def _generate_fallback_analysis(self, test_output: str) -> Dict:
         """Generate basic analysis when LLM fails"""
-        total_tests = len(re.findall(r'\.{3} ok|\.{3} FAIL|\.{3} ERROR', test_output))
-        passed = len(re.findall(r'\.{3} ok', test_output))
+        # Count every outcome in a single scan of the output
+        counts = Counter(match.group(1) for match in _RESULT_RE.finditer(test_output))
+        passed = counts['ok']
+        errors = counts['ERROR']
+        total_tests = passed + counts['FAIL'] + errors
         failed = total_tests - passed
 
         return {
@@ -53,7 +66,7 @@ class ResultAnalyzer:
                 "total_tests": total_tests,
                 "passed": passed,
                 "failed": failed,
-                "errors": len(re.findall(r'\.{3} ERROR', test_output))
+                "errors": errors
             },
             "score": round((passed / total_tests * 5) if total_tests > 0 else 0, 1),
             "feedback": f"Passed {passed} out of {total_tests} tests.",
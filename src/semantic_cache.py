@@ -0,0 +1,84 @@
+# src/semantic_cache.py
+
+import os
+import tempfile
+import numpy as np
+from typing import Callable, List, Optional
+from config.config import Config
+from . import _json_compat
+
+class SemanticCache:
+    """
+    Near-miss cache for model replies. Entries are keyed by an embedding of a short
+    summary of the code's structure, so small edits such as renamed locals or new
+    comments still hit when the cosine similarity clears the threshold.
+    """
+    def __init__(self, embed: Callable[[str], List[float]], threshold: float = 0.95,
+                 path: Optional[str] = None):
+        self.embed = embed
+        self.threshold = threshold
+        self.path = path or os.path.join(Config.CACHE_DIR, 'semantic_cache.json')
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._responses = []
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'rb') as f:
+                data = _json_compat.loads(f.read())
+            self._vectors = np.asarray(data['vectors'], dtype=np.float32)
+            self._responses = list(data['responses'])
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def _save(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            payload = _json_compat.dump_bytes({
+                'vectors': self._vectors.tolist(),
+                'responses': self._responses
+            })
+            # A unique temp file, so concurrent writers never share one
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or '.', suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Error saving semantic cache: {e}")
+
+    def _normalized(self, text: str) -> Optional[np.ndarray]:
+        """Embed text as a unit vector, or return None when the embedding call fails"""
+        try:
+            vector = np.asarray(self.embed(text), dtype=np.float32)
+        except Exception as e:
+            print(f"Error embedding text for the semantic cache: {e}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, text: str) -> Optional[str]:
+        """Return the reply cached for the most similar summary, or None below the threshold"""
+        if not self._responses:
+            return None
+        vector = self._normalized(text)
+        if vector is None or vector.shape[0] != self._vectors.shape[1]:
+            return None
+        # Vectors are unit length, so the dot product is the cosine similarity
+        similarities = self._vectors @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] >= self.threshold:
+            return self._responses[best]
+        return None
+
+    def put(self, text: str, response: str) -> None:
+        """Store a reply under the embedding of text, skipping it when the text cannot be embedded"""
+        vector = self._normalized(text)
+        if vector is None:
+            return
+        if self._responses and vector.shape[0] != self._vectors.shape[1]:
+            # The embedding model changed; start over rather than mix dimensions
+            self._vectors = np.empty((0, vector.shape[0]), dtype=np.float32)
+            self._responses = []
+        self._vectors = np.vstack([self._vectors.reshape(-1, vector.shape[0]), vector])
+        self._responses.append(response)
+        self._save()
\ No newline at end of file
@@ -1,14 +1,45 @@
-import json
 import re
 from typing import Dict, Optional
+from . import _json_compat
+from ._json_extract import extract_json_block
+from ._cache import DiskCache
+
+# Patterns used on every parse, compiled once at import time
+_KEY_QUOTE_RE = re.compile(r'(?<!\\)"(\w+)":')
+
+# Parsed test cases keyed by the code they cover
+_TEST_CASES_CACHE = DiskCache('test_cases')
+# Bump whenever the test case prompt or result schema changes, so stale entries are never read
+_TEST_CASES_VERSION = 1
 
 class TestCaseGenerator:
     def __init__(self, model):
         self.model = model
 
+    def _cache_key(self, code: str) -> str:
+        """Key test cases by schema version and model as well as the code"""
+        return f"v{_TEST_CASES_VERSION}:{getattr(self.model, 'model_name', '')}:{code}"
+
     def generate_test_cases(self, code: str) -> Dict:
         """Generate comprehensive test cases"""
-        prompt = f"""
+        cached = _TEST_CASES_CACHE.get(self._cache_key(code))
+        if cached is not None:
+            return cached
+
+        prompt = self._generate_prompt(code)
+
+        try:
+            response = self.model.generate_content(prompt)
+            test_cases = self._parse_test_cases_response(response.text)
+            _TEST_CASES_CACHE.put(self._cache_key(code), test_cases)
+            return test_cases
+        except Exception as e:
+            print(f"Error generating test cases: {e}")
+            return self._generate_basic_test_cases(code)
+
+    def _generate_prompt(self, code: str) -> str:
+        """Build the test case prompt for the given code"""
+        return f"""
         Generate comprehensive test cases for this Python code.
         Return ONLY a JSON object in this exact format:
         {{
@@ -42,28 +73,17 @@ class TestCaseGenerator:
         4. Input validation
         """
 
-        try:
-            response = self.model.generate_content(prompt)
-            return self._parse_test_cases_response(response.text)
-        except Exception as e:
-            print(f"Error generating test cases: {e}")
-            return self._generate_basic_test_cases(code)
-
     def _parse_test_cases_response(self, response_text: str) -> Dict:
         """Parse the LLM response into test cases"""
-        # Similar JSON parsing logic as in CodeAnalyzer
-        if "```json" in response_text:
-            json_str = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            json_str = response_text.split("```")[1].strip()
-        else:
-            start = response_text.find('{')
-            end = response_text.rfind('}') + 1
-            json_str = response_text[start:end]
+        json_str = extract_json_block(response_text)
 
-        json_str = re.sub(r'(?<!\\)"(\w+)":', r'"\1":', json_str)
-        json_str = json_str.replace("'", '"')
-        return json.loads(json_str)
+        # Most replies are already valid JSON; only rewrite the string when they are not
+        try:
+            return _json_compat.loads(json_str)
+        except ValueError:
+            json_str = _KEY_QUOTE_RE.sub(r'"\1":', json_str)
+            json_str = json_str.replace("'", '"')
+            return _json_compat.loads(json_str)
 
     def _generate_basic_test_cases(self, code: str) -> Dict:
         """Generate basic test cases when LLM fails"""
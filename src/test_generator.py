@@ -1,142 +1,69 @@
 # src/test_generator.py
 
-import google.generativeai as genai
-from typing import Dict, List, Any
-import json
+from typing import Dict, List, Any, Tuple
 import re
 import os
+import sys
+import asyncio
+import string
 import ast
-from dataclasses import dataclass
-
-@dataclass
-class CodeAnalysis:
-    """Structure to hold code analysis results"""
-    functions: List[Dict[str, Any]]
-    classes: List[Dict[str, Any]]
-    imports: List[str]
-    module_name: str
-
-class TestGenerator:
-    def __init__(self, api_key: str):
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-pro')
-
-    def read_python_file(self, file_path: str) -> str:
-        """Read Python code from file"""
-        try:
-            with open(file_path, 'r') as file:
-                return file.read()
-        except FileNotFoundError:
-            print(f"Error: File '{file_path}' not found.")
-            return ""
-        except Exception as e:
-            print(f"Error reading file: {e}")
-            return ""
-
-    def analyze_code(self, code: str, file_path: str) -> CodeAnalysis:
-        """Analyze the Python code structure"""
-        try:
-            tree = ast.parse(code)
-            analysis = {
-                'functions': [],
-                'classes': [],
-                'imports': [],
-                'module_name': os.path.splitext(os.path.basename(file_path))[0]
-            }
-
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    func_info = {
-                        'name': node.name,
-                        'args': [{'name': arg.arg, 'type': self._get_type_hint(arg)} for arg in node.args.args],
-                        'returns': self._get_return_type(node),
-                        'docstring': ast.get_docstring(node),
-                        'is_method': isinstance(node.parent, ast.ClassDef) if hasattr(node, 'parent') else False
-                    }
-                    analysis['functions'].append(func_info)
-
-                elif isinstance(node, ast.ClassDef):
-                    class_info = {
-                        'name': node.name,
-                        'methods': [],
-                        'docstring': ast.get_docstring(node)
-                    }
-                    for item in node.body:
-                        if isinstance(item, ast.FunctionDef):
-                            method_info = {
-                                'name': item.name,
-                                'args': [{'name': arg.arg, 'type': self._get_type_hint(arg)} for arg in item.args.args],
-                                'returns': self._get_return_type(item),
-                                'docstring': ast.get_docstring(item)
-                            }
-                            class_info['methods'].append(method_info)
-                    analysis['classes'].append(class_info)
-
-            return CodeAnalysis(**analysis)
-
-        except Exception as e:
-            print(f"Error analyzing code: {e}")
-            return CodeAnalysis(functions=[], classes=[], imports=[], module_name='module')
-
-    def process_code(self, code: str, file_path: str) -> Dict:
-        """Process the code and generate tests"""
-        try:
-            analysis = self.analyze_code(code, file_path)
-            prompt = self._generate_prompt(code, analysis)
-
-            print("\nGenerating tests...")
-            response = self.model.generate_content(prompt)
-            response_text = response.text
-
-            unittest_code = self._process_ai_response(response_text, analysis)
-            test_cases = self._generate_test_cases(analysis)
-
-            return {
-                'test_cases': test_cases,
-                'unittest_code': unittest_code
-            }
-
-        except Exception as e:
-            print(f"Error in test generation: {e}")
-            return self._generate_fallback_tests(code, file_path)
-
-    def _generate_prompt(self, code: str, analysis: CodeAnalysis) -> str:
-        """Generate comprehensive prompt for test generation"""
-        # Format functions with signatures and docstrings
-        functions_list = '\n'.join([
-            f"- {func['name']}({', '.join(arg['name'] + ': ' + arg['type'] for arg in func['args'])})"
-            f"{' -> ' + func['returns'] if func.get('returns') else ''}"
-            f"\n  Doc: {func.get('docstring', 'No docstring')}"
-            for func in analysis.functions
-        ])
-    
-        # Format classes with methods and docstrings
-        classes_list = '\n'.join([
-            f"- {cls['name']}\n"
-            f"  Doc: {cls.get('docstring', 'No docstring')}\n"
-            f"  Methods:\n" +
-            '\n'.join([f"    • {m['name']}({', '.join(arg['name'] + ': ' + arg['type'] for arg in m['args'])})"
-                       f"{' -> ' + m['returns'] if m.get('returns') else ''}"
-                       for m in cls['methods']])
-            for cls in analysis.classes
-        ])
-    
-        return f"""
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from . import _json_compat
+from ._cache import DiskCache
+from .batched_model import BatchedModel
+from config.config import Config
+
+# Patterns used on every generation and feedback call, compiled once at import time
+_RAN_RE = re.compile(r'Ran (\d+) tests? in')
+_LINE_COMMENT_RE = re.compile(r'//.*?\n')
+_TRAILING_COMMA_RE = re.compile(r',(\s*[}\]])')
+_KEY_RE = re.compile(r'(?<!\\)"([^"]*?)":')
+_JSON_RE = re.compile(r'\{.*\}', re.DOTALL)
+_BOOL_RE = re.compile(r':\s*(true|false)')
+_TEST_CLASS_RE = re.compile(r'^\s*class\s+Test', re.MULTILINE)
+
+class _PrintableTable(dict):
+    """str.translate table mapping anything outside printable ASCII to a space"""
+    def __missing__(self, codepoint: int) -> int:
+        value = codepoint if 0x20 <= codepoint <= 0x7E else 0x20
+        self[codepoint] = value
+        return value
+
+_PRINTABLE_TABLE = _PrintableTable()
+
+# Raw model replies keyed by the full prompt that produced them
+_GENERATION_CACHE = DiskCache('generate')
+_FEEDBACK_CACHE = DiskCache('feedback')
+# Structural analyses keyed by module name and code hash, so warm runs skip parsing
+_STRUCTURE_CACHE = DiskCache('structure', memory_size=0)
+# Bump whenever CodeAnalysis or the record layout changes, so stale entries are never read
+_STRUCTURE_VERSION = 1
+
+# Static parts of the test generation prompt, built once; only the code and
+# its structure are filled in per call
+_PROMPT_HEAD = """
         You are an expert Python developer and testing specialist tasked with creating professional-grade unit tests.
     
         === CODE TO TEST ===
         ```python
-        {code}
+        """
+
+_PROMPT_TAIL_TEMPLATE = """
         ```
     
         === CODE STRUCTURE ===
-        Module: {analysis.module_name}
+        Module: {module_name}
     
         Functions:
-        {functions_list if functions_list else 'No functions defined'}
+        {functions_list}
     
         Classes:
-        {classes_list if classes_list else 'No classes defined'}
+        {classes_list}
     
         === TESTING REQUIREMENTS ===
     
@@ -212,24 +139,444 @@ class TestGenerator:
         - Consider performance implications
         """
 
-    def _process_ai_response(self, response_text: str, analysis: CodeAnalysis) -> str:
-        """Process and format the AI response into valid unittest code"""
-        code_match = re.search(r'```python(.*?)```', response_text, re.DOTALL)
-        unittest_code = code_match.group(1) if code_match else response_text
+# The tail split once into (literal text, field name) pairs, so building a
+# prompt is a single join with no format string parsing
+_PROMPT_TAIL_PARTS = tuple(
+    (literal, name) for literal, name, _, _ in string.Formatter().parse(_PROMPT_TAIL_TEMPLATE)
+)
 
-        unittest_code = unittest_code.strip()
+# Slotted instances skip the per-instance __dict__; the option needs Python 3.10
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
 
-        imports = f"""import unittest
+@dataclass(frozen=True, **_SLOTS)
+class CodeAnalysis:
+    """Structure to hold code analysis results"""
+    functions: List[Dict[str, Any]]
+    classes: List[Dict[str, Any]]
+    imports: List[str]
+    module_name: str
+    # Top-level names, collected during the analysis pass
+    function_names: List[str] = field(default_factory=list)
+    class_names: List[str] = field(default_factory=list)
+
+# Header for generated test files; the module under test sits one directory up
+_TEST_IMPORTS = """import unittest
 import sys
 import os
 
 # Add the parent directory to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from {analysis.module_name} import *
+from {module_name} import *
 """
 
-        if 'class Test' not in unittest_code:
-            class_name = analysis.classes[0]['name'] if analysis.classes else 'Functions'
+# Placeholder suite for code with no functions or classes to test
+_EMPTY_TEST_SUITE = """
+class TestFunctions(unittest.TestCase):
+    def setUp(self):
+        \"\"\"Set up test fixtures\"\"\"
+        pass
+
+    def tearDown(self):
+        \"\"\"Clean up after tests\"\"\"
+        pass
+
+
+
+
+if __name__ == '__main__':
+    unittest.main()"""
+
+# Calling each type gives a fresh empty value, so no test case shares a mutable default
+_DEFAULT_FACTORIES = {
+    'str': str,
+    'int': int,
+    'float': float,
+    'bool': bool,
+    'list': list,
+    'dict': dict,
+    'tuple': tuple,
+    'set': set,
+}
+
+_FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+def _docstring(node: ast.AST):
+    """Return the raw docstring of a def or class, skipping get_docstring's type checks"""
+    body = node.body
+    if body and type(body[0]) is ast.Expr:
+        value = body[0].value
+        if type(value) is ast.Constant and type(value.value) is str:
+            return value.value
+    return None
+
+def _function_info(node: ast.FunctionDef, is_method: bool) -> Dict:
+    return {
+        'name': node.name,
+        'is_method': is_method,
+        'args': [{'name': arg.arg, 'type': TestGenerator._get_type_hint(arg)} for arg in node.args.args],
+        'returns': TestGenerator._get_return_type(node),
+        'docstring': _docstring(node)
+    }
+
+def _signature(func: Dict) -> str:
+    """Render name(arg: type, ...) -> returns for the prompt's structure listing"""
+    args = ', '.join([arg['name'] + ': ' + arg['type'] for arg in func['args']])
+    returns = func.get('returns')
+    return f"{func['name']}({args})" + (' -> ' + returns if returns else '')
+
+def _read_source(file_path: str) -> str:
+    """Read a source file, returning an empty string on failure"""
+    try:
+        # One read sized to the file, skipping the buffered text IO layers
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            data = os.read(fd, os.fstat(fd).st_size)
+        finally:
+            os.close(fd)
+        text = data.decode('utf-8')
+        # Keep the universal-newline behaviour of text mode
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text
+    except FileNotFoundError:
+        print(f"Error: File '{file_path}' not found.")
+        return ""
+    except Exception as e:
+        print(f"Error reading file: {e}")
+        return ""
+
+@functools.lru_cache(maxsize=256)
+def _module_name(file_path: str) -> str:
+    return os.path.splitext(os.path.basename(file_path))[0]
+
+# Analyses per (content digest, module name), most recently used last; the
+# source is never part of the key, so lookups stay cheap and it is not kept
+_ANALYSES = OrderedDict()
+_ANALYSES_MAX = 128
+_analyses_lock = threading.Lock()
+
+def _analyze_cached(code_hash: bytes, code: str, module_name: str) -> CodeAnalysis:
+    """Parse and analyze code once per content hash and module name"""
+    key = (code_hash, module_name)
+    with _analyses_lock:
+        analysis = _ANALYSES.get(key)
+        if analysis is not None:
+            _ANALYSES.move_to_end(key)
+            return analysis
+
+    analysis = _analyze(code_hash, code, module_name)
+    with _analyses_lock:
+        _ANALYSES[key] = analysis
+        if len(_ANALYSES) > _ANALYSES_MAX:
+            _ANALYSES.popitem(last=False)
+    return analysis
+
+def _analyze(code_hash: bytes, code: str, module_name: str) -> CodeAnalysis:
+    """Analyze code, reading and writing the structure cache on disk"""
+    cache_key = f"v{_STRUCTURE_VERSION}:{module_name}:{code_hash.hex()}"
+    cached = _STRUCTURE_CACHE.get(cache_key)
+    if cached is not None:
+        try:
+            return CodeAnalysis(**cached)
+        except TypeError:
+            # An entry that no longer fits the dataclass is just a miss
+            pass
+
+    try:
+        functions = []
+        classes = []
+        function_names = []
+        class_names = []
+        # Only module-level definitions and the methods directly inside classes
+        # are testable, so function bodies are never visited
+        for node in ast.parse(code).body:
+            # ast.parse only builds concrete node classes, so an exact type
+            # check is enough and cheaper than isinstance
+            kind = type(node)
+            if kind in _FUNCTION_NODES:
+                functions.append(_function_info(node, is_method=False))
+                function_names.append(node.name)
+            elif kind is ast.ClassDef:
+                classes.append({
+                    'name': node.name,
+                    'methods': [_function_info(item, is_method=True) for item in node.body if type(item) in _FUNCTION_NODES],
+                    'docstring': _docstring(node)
+                })
+                class_names.append(node.name)
+
+        analysis = CodeAnalysis(
+            functions=functions,
+            classes=classes,
+            imports=[],
+            module_name=module_name,
+            function_names=function_names,
+            class_names=class_names
+        )
+        _STRUCTURE_CACHE.put(cache_key, asdict(analysis))
+        return analysis
+
+    except Exception as e:
+        print(f"Error analyzing code: {e}")
+        return CodeAnalysis(functions=[], classes=[], imports=[], module_name='module')
+
+def _parse_and_analyze(path: str):
+    """Read and analyze one file in a worker process"""
+    code = _read_source(path)
+    code_hash = hashlib.blake2b(code.encode('utf-8')).digest()
+    return code, code_hash, _analyze_cached(code_hash, code, _module_name(path))
+
+class TestGenerator:
+    def __init__(self, api_key: str):
+        # Imported here since the SDK pulls in gRPC and protobuf, which the
+        # analysis helpers in this module never need
+        import google.generativeai as genai
+        from google.ai import generativelanguage as glm
+        # genai.configure is process-wide, so the key is bound to this instance's
+        # own clients instead; generators for different keys never share one
+        self._client_options = {'api_key': api_key}
+        self._client = glm.GenerativeServiceClient(client_options=self._client_options)
+        self.model = genai.GenerativeModel('gemini-pro')
+        # The model only falls back to the global client when none is set
+        self.model._client = self._client
+        self._async_loop = None
+        self.semantic_cache = None
+        if Config.SEMANTIC_CACHE:
+            from .semantic_cache import SemanticCache
+            self.semantic_cache = SemanticCache(self._embed)
+
+    def _embed(self, text: str) -> List[float]:
+        """Embed text with Gemini's embedding endpoint"""
+        import google.generativeai as genai
+        return genai.embed_content(
+            model='models/text-embedding-004', content=text, client=self._client
+        )['embedding']
+
+    @staticmethod
+    def _structure_summary(analysis: CodeAnalysis) -> str:
+        """Summarize the testable surface of the code for semantic cache lookups"""
+        signatures = sorted(
+            f"{func['name']}({', '.join(arg['name'] for arg in func['args'])})"
+            for func in analysis.functions
+        )
+        classes = sorted(
+            f"{cls['name']}[{', '.join(sorted(m['name'] for m in cls['methods']))}]"
+            for cls in analysis.classes
+        )
+        return f"{analysis.module_name}|{signatures}|{classes}"
+
+    def read_python_file(self, file_path: str) -> str:
+        """Read Python code from file"""
+        return _read_source(file_path)
+
+    async def read_python_file_async(self, file_path: str) -> str:
+        """Read Python code from file in a worker thread, so reads overlap with model calls"""
+        return await asyncio.to_thread(_read_source, file_path)
+
+    def analyze_code(self, code: str, file_path: str, code_hash: bytes = None) -> CodeAnalysis:
+        """Analyze the Python code structure, reusing the result for unchanged code"""
+        if code_hash is None:
+            code_hash = hashlib.blake2b(code.encode('utf-8')).digest()
+        return _analyze_cached(code_hash, code, _module_name(file_path))
+
+    def process_code(self, code: str, file_path: str) -> Dict:
+        """Process the code and generate tests"""
+        code_hash = hashlib.blake2b(code.encode('utf-8')).digest()
+        return self._generate_tests(code, file_path, code_hash)
+
+    def process_files(self, paths: List[str]) -> Dict[str, Dict]:
+        """Generate tests for several files, reading and analyzing them in parallel"""
+        if not paths:
+            return {}
+        # Parsing is CPU-bound, so it fans out across processes; the model
+        # calls that follow stay serial since they are rate limited anyway
+        with ProcessPoolExecutor(max_workers=min(len(paths), os.cpu_count() or 1)) as executor:
+            parsed = list(executor.map(_parse_and_analyze, paths))
+
+        results = {}
+        for path, (code, code_hash, analysis) in zip(paths, parsed):
+            if code:
+                results[path] = self._generate_tests(code, path, code_hash, analysis)
+        return results
+
+    def process_codes(self, items: List[Tuple[str, str]]) -> List[Dict]:
+        """Generate tests for several (code, file_path) pairs, sending the uncached prompts together"""
+        prepared = []
+        pending = []
+        for code, file_path in items:
+            code_hash = hashlib.blake2b(code.encode('utf-8')).digest()
+            analysis = self.analyze_code(code, file_path, code_hash)
+            prompt, response_text = self._prepare_generation(code, analysis)
+            if response_text is None:
+                pending.append(len(prepared))
+            prepared.append([code, file_path, code_hash, analysis, prompt, response_text])
+
+        # One round of concurrent calls for every prompt the caches could not answer
+        replies = BatchedModel(self.model).generate_many([prepared[i][4] for i in pending]) if pending else []
+        for i, reply in zip(pending, replies):
+            if not isinstance(reply, Exception):
+                self._store_reply(prepared[i][4], prepared[i][3], reply)
+            prepared[i][5] = reply
+
+        results = []
+        for code, file_path, code_hash, analysis, prompt, reply in prepared:
+            try:
+                if isinstance(reply, Exception):
+                    raise reply
+                results.append(self._build_tests(reply, analysis))
+            except Exception as e:
+                print(f"Error in test generation: {e}")
+                results.append(self._generate_fallback_tests(code, file_path, code_hash, analysis))
+        return results
+
+    def _bind_async_client(self):
+        """Give the model an async client for this key on the running event loop"""
+        # gRPC async clients belong to the loop they were created on
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            from google.ai import generativelanguage as glm
+            self.model._async_client = glm.GenerativeServiceAsyncClient(client_options=self._client_options)
+            self._async_loop = loop
+
+    async def _agenerate(self, prompt: str, semaphore: asyncio.Semaphore = None):
+        """Call the model asynchronously, holding a semaphore slot when one is given"""
+        self._bind_async_client()
+        if semaphore is None:
+            return await self.model.generate_content_async(prompt)
+        async with semaphore:
+            return await self.model.generate_content_async(prompt)
+
+    async def process_code_async(self, code: str, file_path: str, semaphore: asyncio.Semaphore = None) -> Dict:
+        """Process the code and generate tests without blocking the event loop on the model call"""
+        code_hash = hashlib.blake2b(code.encode('utf-8')).digest()
+        analysis = self.analyze_code(code, file_path, code_hash)
+        try:
+            prompt, response_text = self._prepare_generation(code, analysis)
+            if response_text is None:
+                response = await self._agenerate(prompt, semaphore)
+                response_text = response.text
+                self._store_reply(prompt, analysis, response_text)
+            return self._build_tests(response_text, analysis)
+
+        except Exception as e:
+            print(f"Error in test generation: {e}")
+            return self._generate_fallback_tests(code, file_path, code_hash, analysis)
+
+    async def process_many(self, files: List[str], concurrency: int = 8) -> Dict[str, Dict]:
+        """Generate tests for several files with up to `concurrency` model calls in flight"""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(path: str):
+            code = await self.read_python_file_async(path)
+            if not code:
+                return path, None
+            # Only the model call takes a slot, so cache hits never wait behind it
+            return path, await self.process_code_async(code, path, semaphore)
+
+        results = await asyncio.gather(*(run(path) for path in files))
+        return {path: result for path, result in results if result is not None}
+
+    def _generate_tests(self, code: str, file_path: str, code_hash: bytes, analysis: CodeAnalysis = None) -> Dict:
+        """Generate tests for code, analyzing it first unless an analysis is given"""
+        if analysis is None:
+            analysis = self.analyze_code(code, file_path, code_hash)
+        try:
+            prompt, response_text = self._prepare_generation(code, analysis)
+            if response_text is None:
+                response = self.model.generate_content(prompt)
+                response_text = response.text
+                self._store_reply(prompt, analysis, response_text)
+            return self._build_tests(response_text, analysis)
+
+        except Exception as e:
+            print(f"Error in test generation: {e}")
+            # Reuse the analysis so the fallback does not parse the code again
+            return self._generate_fallback_tests(code, file_path, code_hash, analysis)
+
+    def _prepare_generation(self, code: str, analysis: CodeAnalysis):
+        """Build the prompt for analyzed code, returning any cached reply alongside"""
+        prompt = self._generate_prompt(code, analysis)
+
+        print("\nGenerating tests...")
+        # The prompt embeds the code, module name and template, so it is the cache key
+        response_text = _GENERATION_CACHE.get(prompt)
+        if response_text is None and self.semantic_cache is not None:
+            response_text = self.semantic_cache.get(self._structure_summary(analysis))
+            if response_text is not None:
+                print("Reusing tests generated for structurally similar code")
+        return prompt, response_text
+
+    def _store_reply(self, prompt: str, analysis: CodeAnalysis, response_text: str):
+        """Cache a fresh model reply for later runs"""
+        _GENERATION_CACHE.put(prompt, response_text)
+        if self.semantic_cache is not None:
+            self.semantic_cache.put(self._structure_summary(analysis), response_text)
+
+    def _build_tests(self, response_text: str, analysis: CodeAnalysis) -> Dict:
+        """Turn a model reply into the unittest code and structured test cases"""
+        unittest_code = self._process_ai_response(response_text, analysis)
+        test_cases = self._generate_test_cases(analysis)
+
+        return {
+            'test_cases': test_cases,
+            'unittest_code': unittest_code
+        }
+
+    def _generate_prompt(self, code: str, analysis: CodeAnalysis) -> str:
+        """Generate comprehensive prompt for test generation"""
+        # Format functions with signatures and docstrings, one line per entry
+        lines = []
+        append = lines.append
+        for func in analysis.functions:
+            append("- " + _signature(func))
+            append(f"  Doc: {func.get('docstring', 'No docstring')}")
+        functions_list = '\n'.join(lines)
+
+        # Format classes with methods and docstrings
+        lines = []
+        append = lines.append
+        for cls in analysis.classes:
+            append("- " + cls['name'])
+            append(f"  Doc: {cls.get('docstring', 'No docstring')}")
+            append("  Methods:")
+            if not cls['methods']:
+                append("")
+            for m in cls['methods']:
+                append("    • " + _signature(m))
+        classes_list = '\n'.join(lines)
+    
+        fields = {
+            'module_name': analysis.module_name,
+            'functions_list': functions_list or 'No functions defined',
+            'classes_list': classes_list or 'No classes defined'
+        }
+        parts = [_PROMPT_HEAD, code]
+        for literal, name in _PROMPT_TAIL_PARTS:
+            parts.append(literal)
+            if name is not None:
+                parts.append(fields[name])
+        return ''.join(parts)
+
+    def _process_ai_response(self, response_text: str, analysis: CodeAnalysis) -> str:
+        """Process and format the AI response into valid unittest code"""
+        # Take the body of the first ```python fence; plain finds avoid the regex engine
+        unittest_code = response_text
+        start = response_text.find('```python')
+        if start != -1:
+            start += len('```python')
+            end = response_text.find('```', start)
+            if end != -1:
+                unittest_code = response_text[start:end]
+
+        unittest_code = unittest_code.strip()
+
+        imports = _TEST_IMPORTS.format(module_name=analysis.module_name)
+
+        # A test class may be indented or spaced oddly, e.g. inside an if block
+        has_class = _TEST_CLASS_RE.search(unittest_code) is not None
+        has_main = '__main__' in unittest_code
+
+        if not has_class:
+            class_name = analysis.class_names[0] if analysis.class_names else 'Functions'
             unittest_code = f"""
 class Test{class_name}(unittest.TestCase):
     def setUp(self):
@@ -243,7 +590,7 @@ class Test{class_name}(unittest.TestCase):
 {unittest_code}
 """
 
-        if '__main__' not in unittest_code:
+        if not has_main:
             unittest_code += "\n\nif __name__ == '__main__':\n    unittest.main()"
 
         return f"{imports}\n{unittest_code}"
@@ -251,10 +598,12 @@ class Test{class_name}(unittest.TestCase):
     def _generate_test_cases(self, analysis: CodeAnalysis) -> Dict:
         """Generate structured test cases based on code analysis"""
         test_cases = {"test_cases": []}
+        if not analysis.functions and not analysis.classes:
+            return test_cases
 
+        # Analysis only records module-level functions here; methods live on their classes
         for func in analysis.functions:
-            if not func['is_method']:
-                test_cases['test_cases'].extend(self._generate_function_test_cases(func))
+            test_cases['test_cases'].extend(self._generate_function_test_cases(func))
 
         for class_info in analysis.classes:
             for method in class_info['methods']:
@@ -283,49 +632,63 @@ class Test{class_name}(unittest.TestCase):
             "description": f"Basic test for {class_name}.{method['name']}"
         }]
 
-    def _get_type_hint(self, node: ast.arg) -> str:
+    @staticmethod
+    def _get_type_hint(node: ast.arg) -> str:
         """Extract type hint from AST node"""
-        return getattr(node, 'annotation', None).__class__.__name__ if hasattr(node, 'annotation') else 'Any'
+        return ast.unparse(node.annotation) if node.annotation else 'Any'
 
-    def _get_return_type(self, node: ast.FunctionDef) -> str:
+    @staticmethod
+    def _get_return_type(node: ast.FunctionDef) -> str:
         """Extract return type from function definition"""
-        return node.returns.__class__.__name__ if hasattr(node, 'returns') and node.returns else 'Any'
+        return ast.unparse(node.returns) if node.returns else 'Any'
 
-    def _get_default_value(self, type_hint: str) -> Any:
+    @staticmethod
+    def _get_default_value(type_hint: str) -> Any:
         """Get default value based on type hint"""
-        defaults = {
-            'str': '',
-            'int': 0,
-            'float': 0.0,
-            'bool': False,
-            'list': [],
-            'dict': {},
-            'tuple': (),
-            'set': set(),
-        }
-        return defaults.get(type_hint, None)
+        factory = _DEFAULT_FACTORIES.get(type_hint)
+        return factory() if factory is not None else None
 
-    def _generate_fallback_tests(self, code: str, file_path: str) -> Dict:
+    def _generate_fallback_tests(self, code: str, file_path: str, code_hash: bytes = None,
+                                 analysis: CodeAnalysis = None) -> Dict:
         """Generate basic tests when AI generation fails"""
-        analysis = self.analyze_code(code, file_path)
+        if analysis is None:
+            analysis = self.analyze_code(code, file_path, code_hash)
         test_cases = self._generate_test_cases(analysis)
-        unittest_code = self._process_ai_response("", analysis)
+        if not analysis.functions and not analysis.classes:
+            # Nothing to test, so the placeholder suite needs no assembly
+            unittest_code = _TEST_IMPORTS.format(module_name=analysis.module_name) + "\n" + _EMPTY_TEST_SUITE
+        else:
+            unittest_code = self._process_ai_response("", analysis)
         return {
             'test_cases': test_cases,
             'unittest_code': unittest_code
         }
     
-    def generate_feedback(self, test_output: str, code: str) -> Dict:
-        """Generate detailed feedback based on test results and code analysis."""
+    def generate_feedback(self, test_output: str, code: str, summary: Dict = None) -> Dict:
+        """
+        Generate detailed feedback based on test results and code analysis.
+        Pass summary (total_tests, passed, failed, errors) to skip parsing the output.
+        """
         try:
-            print("\n=== Parsing Test Results ===")
-
-            # Test result parsing
-            summary_match = re.search(r'Ran (\d+) tests? in', test_output)
-            total_tests = int(summary_match.group(1)) if summary_match else 0
-            passed = len(re.findall(r' \.\.\. ok', test_output))
-            failed = len(re.findall(r' \.\.\. FAIL', test_output))
-            errors = len(re.findall(r' \.\.\. ERROR', test_output))
+            if summary is not None:
+                total_tests = summary['total_tests']
+                passed = summary['passed']
+                failed = summary['failed']
+                errors = summary['errors']
+            else:
+                print("\n=== Parsing Test Results ===")
+
+                # Test result parsing
+                # The summary line closes unittest output, so look for it from the end
+                start = test_output.rfind('Ran ')
+                summary_match = _RAN_RE.match(test_output, start) if start != -1 else None
+                if summary_match is None:
+                    summary_match = _RAN_RE.search(test_output)
+                total_tests = int(summary_match.group(1)) if summary_match else 0
+                # Fixed substrings need no regex; str.count allocates no matches
+                passed = test_output.count(' ... ok')
+                failed = test_output.count(' ... FAIL')
+                errors = test_output.count(' ... ERROR')
 
             print(f"Found: {total_tests} total, {passed} passed, {failed} failed, {errors} errors")
 
@@ -415,13 +778,19 @@ class Test{class_name}(unittest.TestCase):
     }}
     """
 
-                print("Sending request to AI model...")
-                response = self.model.generate_content(prompt)
-                print("Received response from AI model")
+                cached_text = _FEEDBACK_CACHE.get(prompt)
+                if cached_text is not None:
+                    print("Using cached AI response")
+                    raw_text = cached_text
+                else:
+                    print("Sending request to AI model...")
+                    response = self.model.generate_content(prompt)
+                    print("Received response from AI model")
+                    raw_text = response.text if hasattr(response, 'text') else str(response.candidates[0].content.parts[0].text)
 
                 try:
                     print("Parsing AI response...")
-                    response_text = response.text if hasattr(response, 'text') else str(response.candidates[0].content.parts[0].text)
+                    response_text = raw_text
 
                     # Clean up response formatting
                     if response_text.startswith("JSON"):
@@ -431,30 +800,15 @@ class Test{class_name}(unittest.TestCase):
                     elif "```" in response_text:
                         response_text = response_text.split("```")[1].strip()
 
-                    # Remove any comments from the JSON
-                    response_text = re.sub(r'//.*?\n', '\n', response_text)
-                    # Remove trailing commas
-                    response_text = re.sub(r',(\s*[}\]])', r'\1', response_text)
-                    # Remove newlines and extra spaces within JSON strings
-                    # response_text = re.sub(r'(?<=":)\s*"[^"]*"', lambda m: m.group().replace('\n', ' ').replace('\r', ' '), response_text)
-                    # Fix unescaped quotes in JSON
-                    response_text = re.sub(r'(?<!\\)"([^"]*?)":', r'"\1":', response_text)
-                    # Remove non-printable characters
-                    response_text = re.sub(r'[^\x20-\x7E]', ' ', response_text)
-
-                    print("\nCleaned response text:")
-                    print(response_text)
-
-                    json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-                    if json_match:
-                        response_text = json_match.group(0)
-                        # Additional cleaning for the extracted JSON
-                        # response_text = response_text.replace('\n', ' ').strip()
-                        # Fix potential issues with boolean values
-                        response_text = re.sub(r':\s*(true|false)', lambda m: ': ' + m.group(1).lower(), response_text)
-
-                    feedback = json.loads(response_text)
+                    try:
+                        # Well-formed replies parse as is, skipping the repair passes
+                        feedback = _json_compat.loads(response_text)
+                    except ValueError:
+                        feedback = _json_compat.loads(self._repair_json(response_text))
                     print("Successfully parsed AI feedback")
+                    # Only replies that parse are worth replaying
+                    if cached_text is None:
+                        _FEEDBACK_CACHE.put(prompt, raw_text)
 
                     # Ensure score is consistent
                     feedback['score'] = score
@@ -462,7 +816,8 @@ class Test{class_name}(unittest.TestCase):
                     print("=== Using AI-Generated Feedback ===")
                     return feedback
 
-                except json.JSONDecodeError as e:
+                # orjson and the standard library both raise ValueError subclasses
+                except ValueError as e:
                     print(f"Failed to parse AI response: {e}")
                     return self._generate_calculated_feedback(total_tests, passed, failed, errors)
 
@@ -474,11 +829,39 @@ class Test{class_name}(unittest.TestCase):
             print(f"Error in feedback generation: {e}")
             return self._generate_calculated_feedback(0, 0, 0, 0)
     
+    @staticmethod
+    def _repair_json(response_text: str) -> str:
+        """Clean up common model quirks so a malformed JSON reply can be parsed"""
+        # Remove any comments from the JSON
+        response_text = _LINE_COMMENT_RE.sub('\n', response_text)
+        # Remove trailing commas
+        response_text = _TRAILING_COMMA_RE.sub(r'\1', response_text)
+        # Remove newlines and extra spaces within JSON strings
+        # response_text = re.sub(r'(?<=":)\s*"[^"]*"', lambda m: m.group().replace('\n', ' ').replace('\r', ' '), response_text)
+        # Fix unescaped quotes in JSON
+        response_text = _KEY_RE.sub(r'"\1":', response_text)
+        # Remove non-printable characters
+        response_text = response_text.translate(_PRINTABLE_TABLE)
+
+        print("\nCleaned response text:")
+        print(response_text)
+
+        json_match = _JSON_RE.search(response_text)
+        if json_match:
+            response_text = json_match.group(0)
+            # Additional cleaning for the extracted JSON
+            # response_text = response_text.replace('\n', ' ').strip()
+            # Fix potential issues with boolean values
+            response_text = _BOOL_RE.sub(lambda m: ': ' + m.group(1).lower(), response_text)
+
+        return response_text
+
     def _generate_calculated_feedback(self, total_tests, passed, failed, errors):
         """Generate basic feedback when AI generation fails."""
         score = (passed / total_tests * 5) if total_tests > 0 else 0
         return {
             "language": "python3",
+            "ai_generated": False,
             "score": score,
             "scoring_explanation": f"Basic automated evaluation based on test results. Passed {passed} out of {total_tests} tests.",
             "issues": [
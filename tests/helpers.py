@@ -0,0 +1,17 @@
+import tempfile
+from unittest.mock import patch
+from config.config import Config
+
+def use_temp_cache_dir(test_case, *caches):
+    """
+    Point Config.CACHE_DIR at a temporary directory for the rest of the test and
+    empty the in-memory layer of each given DiskCache, restoring both afterwards
+    """
+    cache_dir = tempfile.TemporaryDirectory()
+    test_case.addCleanup(cache_dir.cleanup)
+    patchers = [patch.object(Config, 'CACHE_DIR', cache_dir.name)]
+    patchers.extend(patch.dict(cache._memory, clear=True) for cache in caches)
+    for patcher in patchers:
+        patcher.start()
+        test_case.addCleanup(patcher.stop)
+    return cache_dir.name
@@ -0,0 +1,121 @@
+import textwrap
+import unittest
+from app import PackageDetector, _fmt_issue, _new_tally, _parse_unittest_output, _tally_line
+
+class TestPackageDetector(unittest.TestCase):
+    def test_scan_finds_nested_imports(self):
+        """Test imports inside functions and try/with/match blocks are found"""
+        code = textwrap.dedent("""\
+            import os
+            import numpy as np
+
+            def load(path):
+                import requests
+                try:
+                    import yaml
+                except ImportError:
+                    from simplejson import loads
+                else:
+                    import toml
+                finally:
+                    import attr
+                with open(path) as f:
+                    import pandas
+                match path:
+                    case "x":
+                        import lxml.etree
+                return [x for x in range(3) if __import__('notscanned')]
+
+            class Loader:
+                def method(self):
+                    if True:
+                        from flask import Flask
+            """)
+
+        packages = PackageDetector().scan_for_imports(code)
+
+        self.assertEqual(packages, {
+            'numpy', 'requests', 'yaml', 'simplejson', 'toml', 'attr', 'pandas', 'lxml', 'flask'
+        })
+
+    def test_scan_of_invalid_code_is_empty(self):
+        """Test code that does not parse yields no packages"""
+        self.assertEqual(PackageDetector().scan_for_imports("def broken(:"), set())
+
+class TestParseUnittestOutput(unittest.TestCase):
+    def test_docstring_descriptions(self):
+        """Test statuses after multi-line docstring descriptions are counted"""
+        output = (
+            "test_a (test_mod.T.test_a)\n"
+            "First line of the docstring. ... ok\n"
+            "test_b (test_mod.T.test_b)\n"
+            "Another docstring. ... FAIL\n"
+            "\n"
+            "Ran 2 tests in 0.001s\n"
+        )
+        summary = _parse_unittest_output(output)
+        self.assertEqual((summary['total_tests'], summary['passed_tests'], summary['failed_tests']), (2, 1, 1))
+
+    def test_skipped_tests(self):
+        """Test skipped tests count towards the total but not as passed"""
+        output = (
+            "test_a (test_mod.T.test_a) ... ok\n"
+            "test_b (test_mod.T.test_b) ... skipped 'not now'\n"
+            "test_c (test_mod.T.test_c) ... ERROR\n"
+            "\n"
+            "Ran 3 tests in 0.001s\n"
+        )
+        summary = _parse_unittest_output(output)
+        self.assertEqual(summary['total_tests'], 3)
+        self.assertEqual((summary['passed_tests'], summary['failed_tests'], summary['error_tests']), (1, 0, 1))
+
+    def test_missing_ran_line(self):
+        """Test the total falls back to the counted outcomes without a Ran line"""
+        output = (
+            "test_a (test_mod.T.test_a) ... ok\n"
+            "test_b (test_mod.T.test_b) ... FAIL\n"
+            "test_c (test_mod.T.test_c) ... ERROR\n"
+        )
+        summary = _parse_unittest_output(output)
+        self.assertEqual(summary['total_tests'], 3)
+        self.assertAlmostEqual(summary['pass_rate'], 1 / 3)
+
+    def test_printed_output_before_status(self):
+        """Test a status pushed onto its own line by the test's output is counted"""
+        output = (
+            "test_a (test_mod.T.test_a) ... hello from a\n"
+            "ok\n"
+            "test_b (test_mod.T.test_b) ... ok\n"
+            "ok\n"
+            "\n"
+            "Ran 2 tests in 0.001s\n"
+        )
+        summary = _parse_unittest_output(output)
+        self.assertEqual((summary['total_tests'], summary['passed_tests']), (2, 2))
+
+    def test_streamed_lines_match_whole_output(self):
+        """Test tallying line by line gives the same counts as parsing the whole output"""
+        lines = ["test_a (test_mod.T.test_a) ... printed", "ok", "test_b (test_mod.T.test_b) ... FAIL", "Ran 2 tests"]
+        counts = _new_tally()
+        for line in lines:
+            _tally_line(counts, line)
+        self.assertEqual((counts['passed'], counts['failed'], counts['ran']), (1, 1, 2))
+
+class TestFormatIssue(unittest.TestCase):
+    def test_html_escaped_outside_code_spans(self):
+        """Test model text is escaped while backtick code spans are left for markdown"""
+        issue = {
+            'severity': 'High',
+            'description': 'Use `a < b` instead of <script>alert(1)</script>',
+            'fix': 'Compare with ``x -> y`` & check'
+        }
+        text = _fmt_issue(issue)
+        self.assertIn('`a < b`', text)
+        self.assertIn('&lt;script&gt;', text)
+        self.assertNotIn('<script>', text)
+        self.assertIn('``x -> y`` &amp; check', text)
+
+    def test_unmatched_backtick_is_escaped(self):
+        """Test a stray backtick does not shield the rest of the text"""
+        text = _fmt_issue({'description': 'a ` <b>bold</b>', 'fix': 'none'})
+        self.assertIn('a ` &lt;b&gt;bold&lt;/b&gt;', text)
@@ -0,0 +1,37 @@
+import os
+import time
+import unittest
+from src._cache import DiskCache
+from tests.helpers import use_temp_cache_dir
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = use_temp_cache_dir(self)
+
+    def _files(self, kind):
+        return [name for name in os.listdir(self.cache_dir) if name.endswith(f"-{kind}.json")]
+
+    def test_round_trip_from_disk(self):
+        """Test an entry written by one cache is read back by another"""
+        DiskCache('replies').put('prompt', {'a': 1})
+        self.assertEqual(DiskCache('replies').get('prompt'), {'a': 1})
+        self.assertIsNone(DiskCache('replies').get('other'))
+
+    def test_least_recently_used_files_evicted(self):
+        """Test writes beyond max_files delete the least recently used entries"""
+        cache = DiskCache('replies', memory_size=0, max_files=2)
+        other = DiskCache('other', memory_size=0, max_files=2)
+        other.put('kept', 'x')
+        past = time.time() - 100
+        for i, text in enumerate(('first', 'second')):
+            cache.put(text, text)
+            os.utime(cache._path(cache._key(text)), (past + i, past + i))
+
+        # Reading 'first' makes 'second' the least recently used
+        self.assertEqual(cache.get('first'), 'first')
+        cache.put('third', 'third')
+
+        self.assertEqual(len(self._files('replies')), 2)
+        self.assertIsNone(cache.get('second'))
+        self.assertEqual(cache.get('first'), 'first')
+        self.assertEqual(other.get('kept'), 'x')
@@ -1,11 +1,14 @@
 import unittest
-from unittest.mock import Mock, patch
-from src.code_analyzer import CodeAnalyzer
+from unittest.mock import Mock
+from src.code_analyzer import CodeAnalyzer, _ANALYSIS_CACHE
+from tests.helpers import use_temp_cache_dir
 
 class TestCodeAnalyzer(unittest.TestCase):
     def setUp(self):
         self.model = Mock()
         self.analyzer = CodeAnalyzer(self.model)
+        # Keep every test isolated from cached analyses
+        use_temp_cache_dir(self, _ANALYSIS_CACHE)
 
     def test_analyze_code(self):
         """Test code analysis"""
@@ -21,6 +24,35 @@ class TestCodeAnalyzer(unittest.TestCase):
         self.assertIn('classes', result)
         self.model.generate_content.assert_called_once()
 
+    def test_analyze_code_cached(self):
+        """Test repeated analysis of unchanged code is served from the cache"""
+        test_code = "def cached_function(): pass"
+        mock_response = Mock()
+        mock_response.text = '{"functions": [], "classes": []}'
+        self.model.generate_content.return_value = mock_response
+
+        first = self.analyzer.analyze_code(test_code)
+        _ANALYSIS_CACHE._memory.clear()
+        second = self.analyzer.analyze_code(test_code)
+
+        self.assertEqual(first, second)
+        self.model.generate_content.assert_called_once()
+
+    def test_cache_keyed_by_model(self):
+        """Test a cached analysis from another model is not reused"""
+        test_code = "def keyed_function(): pass"
+        mock_response = Mock()
+        mock_response.text = '{"functions": [], "classes": []}'
+        self.model.model_name = 'models/first'
+        self.model.generate_content.return_value = mock_response
+        self.analyzer.analyze_code(test_code)
+
+        other_model = Mock(model_name='models/second')
+        other_model.generate_content.return_value = mock_response
+        CodeAnalyzer(other_model).analyze_code(test_code)
+
+        other_model.generate_content.assert_called_once()
+
     def test_basic_analysis_fallback(self):
         """Test fallback analysis"""
         test_code = "class TestClass:\n    def test_method(self): pass"
@@ -0,0 +1,45 @@
+import unittest
+from unittest.mock import Mock
+from src.code_analyzer import _ANALYSIS_CACHE
+from src.combined_generator import CombinedGenerator
+from src.test_case_generator import _TEST_CASES_CACHE
+from tests.helpers import use_temp_cache_dir
+
+class TestCombinedGenerator(unittest.TestCase):
+    def setUp(self):
+        self.model = Mock()
+        self.generator = CombinedGenerator(self.model)
+        use_temp_cache_dir(self, _ANALYSIS_CACHE, _TEST_CASES_CACHE)
+        self.code = "def add(a, b):\n    return a + b"
+
+    def test_both_parts_from_one_call(self):
+        """Test a complete reply fills and caches both parts"""
+        self.model.generate_content.return_value = Mock(
+            text='{"analysis": {"functions": []}, "test_cases": {"test_cases": []}}'
+        )
+
+        analysis, test_cases = self.generator.analyze_and_generate(self.code)
+
+        self.assertEqual(analysis, {'functions': []})
+        self.assertEqual(test_cases, {'test_cases': []})
+        self.assertEqual(_TEST_CASES_CACHE.get(self.generator.case_generator._cache_key(self.code)), {'test_cases': []})
+        self.model.generate_content.assert_called_once()
+
+    def test_missing_section_falls_back_alone(self):
+        """Test a reply without test cases keeps its analysis and falls back for the rest"""
+        self.model.generate_content.return_value = Mock(text='{"analysis": {"functions": []}}')
+
+        analysis, test_cases = self.generator.analyze_and_generate(self.code)
+
+        self.assertEqual(analysis, {'functions': []})
+        self.assertEqual(_ANALYSIS_CACHE.get(self.generator.analyzer._cache_key(self.code)), {'functions': []})
+        self.assertEqual(test_cases, self.generator.case_generator._generate_basic_test_cases(self.code))
+        self.assertIsNone(_TEST_CASES_CACHE.get(self.generator.case_generator._cache_key(self.code)))
+
+    def test_cached_parts_skip_the_model(self):
+        """Test no call is made when both parts are cached"""
+        _ANALYSIS_CACHE.put(self.generator.analyzer._cache_key(self.code), {'functions': []})
+        _TEST_CASES_CACHE.put(self.generator.case_generator._cache_key(self.code), {'test_cases': []})
+
+        self.assertEqual(self.generator.analyze_and_generate(self.code), ({'functions': []}, {'test_cases': []}))
+        self.model.generate_content.assert_not_called()
@@ -0,0 +1,24 @@
+import unittest
+from src._json_extract import extract_json_block
+
+class TestExtractJsonBlock(unittest.TestCase):
+    def test_json_fence(self):
+        """Test the body of a ```json fence is returned"""
+        self.assertEqual(extract_json_block('Here:\n```json\n{"a": 1}\n```\nDone'), '{"a": 1}')
+
+    def test_plain_fence(self):
+        """Test a plain ``` fence is used when there is no json one"""
+        self.assertEqual(extract_json_block('```\n{"a": 1}\n```'), '{"a": 1}')
+
+    def test_json_fence_after_other_fence(self):
+        """Test a later ```json fence wins over an earlier plain fence"""
+        text = '```python\nx = 1\n```\n```json\n{"a": 1}\n```'
+        self.assertEqual(extract_json_block(text), '{"a": 1}')
+
+    def test_unterminated_fence(self):
+        """Test an unterminated fence runs to the end of the reply"""
+        self.assertEqual(extract_json_block('```json\n{"a": 1}\n'), '{"a": 1}')
+
+    def test_bare_braces(self):
+        """Test replies without fences fall back to the outermost braces"""
+        self.assertEqual(extract_json_block('Result: {"a": {"b": 2}} end'), '{"a": {"b": 2}}')
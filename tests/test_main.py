@@ -0,0 +1,128 @@
+import os
+import py_compile
+import sys
+import tempfile
+import textwrap
+import unittest
+from unittest.mock import patch
+from main import _compiled_code, _load_test_module, _run_tests, _write_bytes
+
+class TestCompiledCode(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = os.path.join(temp_dir.name, 'sample_test.py')
+        self._write_source("VALUE = 1\n")
+
+    def _write_source(self, source):
+        with open(self.path, 'w') as f:
+            f.write(source)
+        with open(self.path, 'rb') as f:
+            self.source = f.read()
+
+    def _code(self):
+        return _compiled_code(self.path, self.source, os.stat(self.path))
+
+    def test_valid_pyc_is_loaded(self):
+        """Test bytecode whose header matches the source is used without compiling"""
+        py_compile.compile(self.path, cfile=self.path + 'c', doraise=True)
+        with patch('builtins.compile') as mock_compile:
+            code = self._code()
+        mock_compile.assert_not_called()
+        namespace = {}
+        exec(code, namespace)
+        self.assertEqual(namespace['VALUE'], 1)
+
+    def test_stale_pyc_is_recompiled(self):
+        """Test bytecode for an older version of the source is ignored"""
+        py_compile.compile(self.path, cfile=self.path + 'c', doraise=True)
+        self._write_source("VALUE = 22\n")
+        namespace = {}
+        exec(self._code(), namespace)
+        self.assertEqual(namespace['VALUE'], 22)
+
+    def test_corrupt_pyc_is_recompiled(self):
+        """Test a pyc with a valid header but unreadable body falls back to compile"""
+        py_compile.compile(self.path, cfile=self.path + 'c', doraise=True)
+        with open(self.path + 'c', 'r+b') as f:
+            f.seek(16)
+            f.write(b'\xff' * 8)
+            f.truncate()
+        namespace = {}
+        exec(self._code(), namespace)
+        self.assertEqual(namespace['VALUE'], 1)
+
+    def test_module_is_loaded_fresh(self):
+        """Test each load executes the current code into a new module"""
+        first = _load_test_module(self.path, 'sample_test')
+        self._write_source("VALUE = 3\n")
+        second = _load_test_module(self.path, 'sample_test')
+        self.assertIsNot(first, second)
+        self.assertEqual((first.VALUE, second.VALUE), (1, 3))
+
+class TestRunTests(unittest.TestCase):
+    def test_code_under_test_is_forgotten(self):
+        """Test modules imported from the path the tests add are dropped after the run"""
+        with tempfile.TemporaryDirectory() as root:
+            output_dir = os.path.join(root, 'output')
+            os.mkdir(output_dir)
+            with open(os.path.join(root, 'sample_code_mod.py'), 'w') as f:
+                f.write("def answer():\n    return 42\n")
+            test_path = os.path.join(output_dir, 'sample_code_mod_test.py')
+            with open(test_path, 'w') as f:
+                f.write(textwrap.dedent("""\
+                    import os
+                    import sys
+                    import unittest
+                    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+                    from sample_code_mod import answer
+
+                    class TestAnswer(unittest.TestCase):
+                        def test_answer(self):
+                            self.assertEqual(answer(), 42)
+                    """))
+
+            path_before = list(sys.path)
+            with patch('builtins.print'):
+                summary, output = _run_tests(test_path, output_dir)
+
+        self.assertEqual(summary, {'tests_run': 1, 'failures': 0, 'errors': 0, 'skipped': 0})
+        self.assertIn('Ran 1 test', output)
+        self.assertNotIn('sample_code_mod', sys.modules)
+        self.assertNotIn('sample_code_mod_test', sys.modules)
+        self.assertEqual(sys.path, path_before)
+
+class TestWriteBytes(unittest.TestCase):
+    def test_unchanged_payload_is_not_rewritten(self):
+        """Test writing the same payload twice leaves the file untouched the second time"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'feedback.json')
+            self.assertTrue(_write_bytes(path, b'{"score": 4}'))
+            inode = os.stat(path).st_ino
+
+            self.assertFalse(_write_bytes(path, b'{"score": 4}'))
+            self.assertEqual(os.stat(path).st_ino, inode)
+
+    def test_changed_payload_replaces_file(self):
+        """Test a different payload atomically replaces the file and leaves no temp file"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'feedback.json')
+            _write_bytes(path, b'{"score": 4}')
+            inode = os.stat(path).st_ino
+
+            self.assertTrue(_write_bytes(path, b'{"score": 5}'))
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), b'{"score": 5}')
+            self.assertNotEqual(os.stat(path).st_ino, inode)
+            self.assertEqual(os.listdir(temp_dir), ['feedback.json'])
+
+    def test_file_mode_follows_umask(self):
+        """Test the replaced file gets the mode the umask allows, not a fixed one"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'feedback.json')
+            previous = os.umask(0o027)
+            try:
+                _write_bytes(path, b'{}')
+            finally:
+                os.umask(previous)
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o640)
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+from src.semantic_cache import SemanticCache
+
+_VECTORS = {
+    'add(a, b)': [1.0, 0.0, 0.0],
+    'add(x, y)': [0.99, 0.05, 0.0],
+    'parse(text)': [0.0, 1.0, 0.0]
+}
+
+class TestSemanticCache(unittest.TestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.path = os.path.join(cache_dir.name, 'semantic_cache.json')
+        self.cache = SemanticCache(_VECTORS.__getitem__, path=self.path)
+
+    def test_similar_text_hits(self):
+        """Test a summary above the similarity threshold returns the stored reply"""
+        self.cache.put('add(a, b)', 'reply')
+        self.assertEqual(self.cache.get('add(x, y)'), 'reply')
+
+    def test_dissimilar_text_misses(self):
+        """Test a summary below the threshold and an empty cache both miss"""
+        self.assertIsNone(self.cache.get('add(a, b)'))
+        self.cache.put('add(a, b)', 'reply')
+        self.assertIsNone(self.cache.get('parse(text)'))
+
+    def test_entries_reloaded_from_disk(self):
+        """Test stored replies survive a new cache instance"""
+        self.cache.put('add(a, b)', 'reply')
+        reloaded = SemanticCache(_VECTORS.__getitem__, path=self.path)
+        self.assertEqual(reloaded.get('add(a, b)'), 'reply')
+
+    def test_embedding_size_change_resets(self):
+        """Test entries of a different embedding size are dropped instead of mixed"""
+        self.cache.put('add(a, b)', 'old')
+        self.cache.embed = lambda text: [1.0, 0.0]
+        self.assertIsNone(self.cache.get('add(a, b)'))
+        self.cache.put('add(a, b)', 'new')
+        self.assertEqual(self.cache.get('add(a, b)'), 'new')
+        self.assertEqual(len(self.cache._responses), 1)
+
+    def test_embedding_failure_is_a_miss(self):
+        """Test a failing embedding call misses on get and skips the put"""
+        self.cache.put('add(a, b)', 'reply')
+
+        def fail(text):
+            raise ConnectionError("embedding service unavailable")
+
+        self.cache.embed = fail
+        self.assertIsNone(self.cache.get('add(a, b)'))
+        self.cache.put('parse(text)', 'other')
+        self.assertEqual(self.cache._responses, ['reply'])
@@ -1,11 +1,18 @@
+import ast
+import asyncio
+import os
+import tempfile
 import unittest
-from unittest.mock import Mock, patch
-from src.test_generator import TestGenerator
+from unittest.mock import AsyncMock, Mock, patch
+from src.test_generator import TestGenerator, _ANALYSES, _GENERATION_CACHE, _STRUCTURE_CACHE
+from tests.helpers import use_temp_cache_dir
 
 class TestTestGenerator(unittest.TestCase):
     def setUp(self):
         self.api_key = "test_api_key"
         self.test_generator = TestGenerator(self.api_key)
+        # Keep cached replies and analyses out of the working tree
+        use_temp_cache_dir(self, _GENERATION_CACHE)
 
     def test_initialization(self):
         """Test TestGenerator initialization"""
@@ -15,8 +22,11 @@ class TestTestGenerator(unittest.TestCase):
 
     def test_read_python_file_success(self):
         """Test successful file reading"""
-        with patch('builtins.open', unittest.mock.mock_open(read_data='test code')):
-            result = self.test_generator.read_python_file('test.py')
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'test.py')
+            with open(file_path, 'w') as f:
+                f.write('test code')
+            result = self.test_generator.read_python_file(file_path)
             self.assertEqual(result, 'test code')
 
     def test_read_python_file_not_found(self):
@@ -37,4 +47,114 @@ class TestTestGenerator(unittest.TestCase):
                 self.assertIn('analysis', result)
                 self.assertIn('test_cases', result)
                 mock_analyze.assert_called_once_with(test_code)
-                mock_generate.assert_called_once_with(test_code)
\ No newline at end of file
+                mock_generate.assert_called_once_with(test_code)
+
+    def test_type_hints_use_annotation_source(self):
+        """Test type hints and return types are read as source strings"""
+        func = ast.parse("def f(a: int, b: List[str], c): return a").body[0]
+        hints = [TestGenerator._get_type_hint(arg) for arg in func.args.args]
+        self.assertEqual(hints, ['int', 'List[str]', 'Any'])
+        self.assertEqual(TestGenerator._get_return_type(func), 'Any')
+
+        func = ast.parse("def g() -> dict: pass").body[0]
+        self.assertEqual(TestGenerator._get_return_type(func), 'dict')
+        self.assertEqual(self.test_generator._get_default_value(TestGenerator._get_return_type(func)), {})
+
+    def test_existing_test_class_is_kept(self):
+        """Test a reply's test class is found even when indented or oddly spaced"""
+        analysis = self.test_generator.analyze_code("def f(x):\n    return x", 'calc.py')
+        for reply in ("if True:\n    class TestF(unittest.TestCase): pass",
+                      "class  TestF(unittest.TestCase): pass"):
+            code = self.test_generator._process_ai_response(reply, analysis)
+            self.assertNotIn('class TestFunctions', code)
+
+        code = self.test_generator._process_ai_response("def test_f(self): pass", analysis)
+        self.assertIn('class TestFunctions', code)
+
+    def test_process_files_analyzes_each_file(self):
+        """Test files are analyzed in parallel and skipped when unreadable"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = []
+            for name, body in (('alpha.py', 'def a(x): pass'), ('beta.py', 'class B:\n    def m(self): pass')):
+                paths.append(os.path.join(temp_dir, name))
+                with open(paths[-1], 'w') as f:
+                    f.write(body)
+            paths.append(os.path.join(temp_dir, 'missing.py'))
+
+            with patch.object(self.test_generator, '_generate_tests') as mock_generate:
+                mock_generate.side_effect = lambda code, path, code_hash, analysis: analysis
+                results = self.test_generator.process_files(paths)
+
+        self.assertEqual(sorted(results), sorted(paths[:2]))
+        self.assertEqual(results[paths[0]].module_name, 'alpha')
+        self.assertEqual(results[paths[0]].functions[0]['name'], 'a')
+        self.assertEqual(results[paths[1]].classes[0]['name'], 'B')
+
+    def test_analysis_reloaded_from_disk(self):
+        """Test a warm analysis is rebuilt from the disk cache without parsing"""
+        code = "def add(a: int, b: int) -> int:\n    return a + b"
+        first = self.test_generator.analyze_code(code, 'calc.py')
+        _ANALYSES.clear()
+        with patch('src.test_generator.ast.parse') as mock_parse:
+            second = self.test_generator.analyze_code(code, 'calc.py')
+        mock_parse.assert_not_called()
+        self.assertEqual(first, second)
+
+    def test_mismatched_disk_entry_is_a_miss(self):
+        """Test a cached analysis with unknown fields is reparsed instead of raising"""
+        code = "def add(a, b):\n    return a + b"
+        first = self.test_generator.analyze_code(code, 'calc.py')
+        _ANALYSES.clear()
+        with patch.object(_STRUCTURE_CACHE, 'get', return_value={'functions': [], 'unknown': 1}):
+            second = self.test_generator.analyze_code(code, 'calc.py')
+        self.assertEqual(first, second)
+
+    def _reply_for(self, prompt):
+        """Build a model reply whose test class names the module the prompt is for"""
+        name = next(name for name in ('alpha', 'beta', 'gamma') if f"def {name}_fn" in prompt)
+        return f"```python\nclass TestReply_{name}(unittest.TestCase):\n    pass\n```"
+
+    def test_process_codes_maps_replies_to_their_items(self):
+        """Test a failed batched prompt falls back for its own item only"""
+        def generate(prompt):
+            if "def beta_fn" in prompt:
+                raise RuntimeError("API Error")
+            return Mock(text=self._reply_for(prompt))
+
+        items = [(f"def {name}_fn(x):\n    return x", f"{name}.py") for name in ('alpha', 'beta', 'gamma')]
+        with patch.object(self.test_generator.model, 'generate_content', side_effect=generate, create=True):
+            results = self.test_generator.process_codes(items)
+
+        self.assertEqual(len(results), 3)
+        self.assertIn('class TestReply_alpha', results[0]['unittest_code'])
+        self.assertNotIn('TestReply', results[1]['unittest_code'])
+        self.assertIn('from beta import *', results[1]['unittest_code'])
+        self.assertIn('class TestReply_gamma', results[2]['unittest_code'])
+
+    def test_process_many_limits_concurrent_calls(self):
+        """Test process_many skips unreadable files and keeps calls within the limit"""
+        in_flight = []
+        peak = []
+
+        async def generate(prompt):
+            in_flight.append(prompt)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0)
+            in_flight.remove(prompt)
+            return Mock(text=self._reply_for(prompt))
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = []
+            for name in ('alpha', 'beta', 'gamma'):
+                paths.append(os.path.join(temp_dir, f"{name}.py"))
+                with open(paths[-1], 'w') as f:
+                    f.write(f"def {name}_fn(x):\n    return x")
+            missing = os.path.join(temp_dir, 'missing.py')
+
+            self.test_generator.model.generate_content_async = AsyncMock(side_effect=generate)
+            results = asyncio.run(self.test_generator.process_many(paths + [missing], concurrency=2))
+
+        self.assertEqual(sorted(results), sorted(paths))
+        self.assertIn('class TestReply_beta', results[paths[1]]['unittest_code'])
+        self.assertEqual(self.test_generator.model.generate_content_async.await_count, 3)
+        self.assertLessEqual(max(peak), 2)
@@ -4,6 +4,10 @@ from typing import Dict, List, Optional, Any
 import ast
 import json
 
+# Patterns used by the helpers below, compiled once at import time
+_UNQUOTED_KEY_RE = re.compile(r'(?<!\\)"(\w+)":')
+_TEST_NAME_RE = re.compile(r'test_\w+')
+
 class file_operations:
     """File operation utilities"""
     @staticmethod
@@ -38,7 +42,7 @@ class code_parser:
                     functions.append({
                         'name': node.name,
                         'args': [arg.arg for arg in node.args.args],
-                        'returns': node.returns.id if node.returns else None
+                        'returns': ast.unparse(node.returns) if node.returns is not None else None
                     })
             return functions
         except Exception as e:
@@ -68,7 +72,7 @@ class string_utils:
     @staticmethod
     def clean_json_string(json_str: str) -> str:
         """Clean and format JSON string"""
-        json_str = re.sub(r'(?<!\\)"(\w+)":', r'"\1":', json_str)
+        json_str = _UNQUOTED_KEY_RE.sub(r'"\1":', json_str)
         json_str = json_str.replace("'", '"')
         return json_str
 
@@ -106,9 +110,10 @@ class test_helpers:
             'errors': 0
         }
         
-        results['total'] = len(re.findall(r'test_\w+', output))
-        results['passed'] = len(re.findall(r'ok', output))
-        results['failed'] = len(re.findall(r'FAIL', output))
-        results['errors'] = len(re.findall(r'ERROR', output))
+        results['total'] = sum(1 for _ in _TEST_NAME_RE.finditer(output))
+        # Fixed substrings need no regex; str.count allocates no matches
+        results['passed'] = output.count('ok')
+        results['failed'] = output.count('FAIL')
+        results['errors'] = output.count('ERROR')
         
         return results
\ No newline at end of file